@@ -0,0 +1,80 @@
+"""Measure the resident size of device objects with tracemalloc.
+
+Usage: python benchmarks/bench_memory.py [count ...]
+"""
+import os
+import sys
+import gc
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.yeelight_pro.core.device import (  # noqa: E402
+    CONVERTER_SETS,
+    AirConditionDevice,
+    AudioDevice,
+    BathHeaterDevice,
+    ContactDevice,
+    CoverDevice,
+    DeviceType,
+    KnobDevice,
+    LightDevice,
+    LightGroupDevice,
+    MotionDevice,
+    NodeType,
+    RelayDoubleDevice,
+    SimpleSwitchDevice,
+    SwitchPanelDevice,
+)
+
+CASES = [
+    (LightDevice, DeviceType.LIGHT_WITH_COLOR, {'p': True, 'l': 80, 'ct': 4000, 'c': 16711680}),
+    (SwitchPanelDevice, DeviceType.SWITCH_PANEL, {'1-p': True, '2-p': False, '3-p': False}),
+    (RelayDoubleDevice, DeviceType.RELAY_DOUBLE, {'1-p': True, '2-p': False}),
+    (KnobDevice, DeviceType.KNOB, {}),
+    (MotionDevice, DeviceType.MOTION_WITH_LIGHT, {'mv': True, 'luminance': 120}),
+    (ContactDevice, DeviceType.MAGNET_SENSOR, {'mc': False}),
+    (CoverDevice, DeviceType.CURTAIN, {'tp': 50, 'cp': 50}),
+    (AirConditionDevice, DeviceType.AIR_CONDITIONER, {'1-acp': True, '1-acm': 1, '1-actt': 24}),
+    (BathHeaterDevice, DeviceType.BATH_HEATER, {'p': True, 'tgt': 40, 't': 25}),
+    (SimpleSwitchDevice, DeviceType.SIMPLE_SWITCH, {'p': True}),
+    (AudioDevice, DeviceType.AUDIO_DEVICE, {'p': True, 'amv': 20}),
+    (LightGroupDevice, DeviceType.LIGHT_WITH_BRIGHTNESS, {'p': True, 'l': 50}),
+]
+
+
+def make_devices(cls, typ, params, count):
+    devices = []
+    for i in range(count):
+        node = {'id': i + 1, 'nt': NodeType.MESH, 'type': typ, 'n': f'device {i}'}
+        if cls is LightGroupDevice:
+            node['nt'] = NodeType.GROUP
+        dvc = cls(node)
+        if params and dvc.prop.merge({'params': dict(params)}):
+            dvc.build_converters()
+        devices.append(dvc)
+    return devices
+
+
+def measure(cls, typ, params, count):
+    CONVERTER_SETS.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    devices = make_devices(cls, typ, params, count)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, 'filename'))
+    del devices
+    return size / count
+
+
+def main(counts):
+    print(f"{'class':<22}" + ''.join(f'{n:>14,}' for n in counts))
+    for cls, typ, params in CASES:
+        row = ''.join(f'{measure(cls, typ, params, n):>12.0f} B' for n in counts)
+        print(f'{cls.__name__:<22}{row}')
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [1_000, 10_000])
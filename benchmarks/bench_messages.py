@@ -0,0 +1,65 @@
+"""Measure how many pushed prop frames per second ProGateway.on_message handles.
+
+Usage: python benchmarks/bench_messages.py [frames] [devices]
+
+Runs with logging at its default levels and again with the protocol logger
+at debug level (sending records to a null handler), to show the logging cost.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.yeelight_pro.core.gateway import ProGateway  # noqa: E402
+from custom_components.yeelight_pro.core.device import LightDevice, DeviceType, NodeType  # noqa: E402
+
+
+def make_frames(count, devices):
+    frames = []
+    for i in range(count):
+        node = {
+            'id': i % devices + 1,
+            'nt': NodeType.MESH,
+            'params': {'p': bool(i % 2), 'l': i % 100 + 1},
+        }
+        frames.append(json.dumps({'method': 'gateway_post.prop', 'nodes': [node]}).encode() + b'\r\n')
+    return frames
+
+
+async def run(frames, devices, **options):
+    gtw = ProGateway('127.0.0.1', **options)
+    for nid in range(1, devices + 1):
+        dvc = LightDevice({'id': nid, 'nt': NodeType.MESH, 'type': DeviceType.LIGHT_WITH_BRIGHTNESS})
+        if dvc.prop.merge({'id': nid, 'params': {'p': True, 'l': 1}}):
+            dvc.build_converters()
+        # registered without add_device, entities are not set up for the benchmark
+        gtw.devices[nid] = dvc
+        dvc.gateways.append(gtw)
+    start = time.perf_counter()
+    for msg in frames:
+        await gtw.on_message(msg)
+    await gtw.settle()
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main(count=50_000, devices=100):
+    logging.basicConfig()
+    frames = make_frames(count, devices)
+    rate = asyncio.run(run(frames, devices))
+    print(f'default log levels:        {rate:>12,.0f} msg/s')
+
+    protocol = logging.getLogger('custom_components.yeelight_pro.core.gateway.protocol')
+    protocol.setLevel(logging.DEBUG)
+    protocol.propagate = False
+    protocol.addHandler(logging.NullHandler())
+    for sample in (1, 100):
+        rate = asyncio.run(run(frames, devices, log_sample=sample))
+        print(f'protocol debug, 1/{sample:<3} logged: {rate:>12,.0f} msg/s')
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,50 @@
+"""Replay a capture recorded by the `yeelight_pro.capture` service offline.
+
+Usage: python benchmarks/replay.py CAPTURE.jsonl [--speed N] [--profile]
+
+`--speed 1` keeps the recorded timing, N plays N times faster and 0 (default)
+as fast as possible. `--profile` prints the top functions by cumulative time.
+"""
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import cProfile
+import pstats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.yeelight_pro.core.gateway import ProGateway  # noqa: E402
+from custom_components.yeelight_pro.core.capture import read_capture, replay  # noqa: E402
+
+
+async def run(path, speed):
+    gtw = ProGateway('127.0.0.1', offline=True, trace_size=0, metrics_interval=0)
+    frames = list(read_capture(path))
+    count, elapsed = await replay(gtw, frames, speed=speed)
+    print(f'{count} frames in {elapsed:.3f}s, {count / elapsed if elapsed else 0:,.0f} msg/s, '
+          f'{len(gtw.devices)} devices')
+    return gtw
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    parser.add_argument('--speed', type=float, default=0)
+    parser.add_argument('--profile', action='store_true')
+    args = parser.parse_args()
+    # offline there are no platforms to set entities up, silence those warnings
+    logging.getLogger('custom_components.yeelight_pro').setLevel(logging.ERROR)
+    if not args.profile:
+        asyncio.run(run(args.path, args.speed))
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    asyncio.run(run(args.path, args.speed))
+    profiler.disable()
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats('yeelight_pro', 30)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
 import logging
 import asyncio
+import cProfile
 import datetime
+import io
+import pstats
+import time
 import voluptuous as vol
+from functools import partial
 
 from homeassistant.helpers import service
-from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.core import HomeAssistant, State, SupportsResponse, callback
 from homeassistant.const import (
     CONF_HOST,
     EVENT_HOMEASSISTANT_STOP,
@@ -16,14 +21,17 @@ from homeassistant.helpers.reload import (
     async_integration_yaml_config,
     async_reload_integration_platforms,
 )
+from homeassistant.helpers.start import async_at_started
 from homeassistant.components import persistent_notification
+import homeassistant.helpers.area_registry as ar
 import homeassistant.helpers.device_registry as dr
 import homeassistant.helpers.config_validation as cv
 
 from .core.const import *
 from .core.gateway import ProGateway
-from .core.device import XDevice, GatewayDevice, WifiPanelDevice
+from .core.device import XDevice, GatewayDevice, WifiPanelDevice, clear_converter_sets
 from .core.converters.base import Converter
+from .core.tracing import CURRENT_TRACE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -72,6 +80,7 @@ async def async_setup(hass: HomeAssistant, hass_config: dict):
             ]
         )
         await gtw.start()
+        async_at_started(hass, partial(async_assign_areas, gtw=gtw))
 
     ComponentServices(hass)
     return True
@@ -83,6 +92,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     if gtw := await get_gateway_from_config(hass, entry):
         await gtw.start()
+        entry.async_on_unload(
+            async_at_started(hass, partial(async_assign_areas, gtw=gtw))
+        )
 
     entry.async_on_unload(
         hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, gtw.stop)
@@ -97,6 +109,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         if isinstance(gtw, ProGateway):
             await gtw.stop()
             hass.data[DOMAIN][CONF_GATEWAYS].pop(entry.entry_id)
+        clear_converter_sets()
 
     return unload_ok
 
@@ -106,6 +119,25 @@ async def async_remove_config_entry_device(hass: HomeAssistant, entry: ConfigEnt
     dr.async_get(hass).async_remove_device(device.id)
 
 
+@callback
+def async_assign_areas(hass: HomeAssistant, gtw: ProGateway):
+    """Put devices without an area into the area of their gateway room."""
+    area_reg = ar.async_get(hass)
+    dev_reg = dr.async_get(hass)
+    for room in gtw.rooms.values():
+        if not room['n']:
+            continue
+        area = None
+        for nid in {room['id'], *room['nodes']}:
+            if not (dvc := gtw.devices.get(nid)):
+                continue
+            entry = dev_reg.async_get_device(identifiers={(DOMAIN, dvc.id)})
+            if not entry or entry.area_id:
+                continue
+            area = area or area_reg.async_get_or_create(room['n'])
+            dev_reg.async_update_device(entry.id, area_id=area.id)
+
+
 async def async_add_setuper(hass: HomeAssistant, config, domain, setuper):
     gtw = await get_gateway_from_config(hass, config)
     if isinstance(gtw, ProGateway):
@@ -148,6 +180,10 @@ async def async_reload_integration_config(hass, config):
 class ComponentServices:
     def __init__(self, hass: HomeAssistant):
         self.hass = hass
+        self._capture_stop = None
+        self._capturing = []
+        self._profile_stop = None
+        self._profiling = None
 
         service.async_register_admin_service(
             hass, DOMAIN, SERVICE_RELOAD, self.handle_reload_config
@@ -163,6 +199,39 @@ class ComponentServices:
             }),
         )
 
+        hass.services.async_register(
+            DOMAIN, 'set_props', self.async_set_props,
+            schema=vol.Schema({
+                vol.Optional(CONF_HOST): cv.string,
+                vol.Required('targets'): vol.All(cv.ensure_list, [vol.All(
+                    vol.Schema({
+                        vol.Exclusive('entity_id', 'target'): cv.entity_id,
+                        vol.Exclusive('node', 'target'): vol.Coerce(int),
+                        vol.Required('values'): dict,
+                    }),
+                    cv.has_at_least_one_key('entity_id', 'node'),
+                )]),
+                vol.Optional('throw', default=False): cv.boolean,
+            }),
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+        service.async_register_admin_service(
+            hass, DOMAIN, 'capture', self.async_capture,
+            schema=vol.Schema({
+                vol.Optional(CONF_HOST): cv.string,
+                vol.Optional('duration', default=60): vol.All(vol.Coerce(float), vol.Range(min=1, max=3600)),
+            }),
+        )
+
+        service.async_register_admin_service(
+            hass, DOMAIN, 'profile', self.async_profile,
+            schema=vol.Schema({
+                vol.Optional('duration', default=30): vol.All(vol.Coerce(float), vol.Range(min=1, max=600)),
+                vol.Optional('top', default=20): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+            }),
+        )
+
     async def handle_reload_config(self, call):
         config = await async_integration_yaml_config(self.hass, DOMAIN)
         if not config or DOMAIN not in config:
@@ -176,16 +245,30 @@ class ComponentServices:
         await asyncio.gather(*reload_tasks)
         await async_reload_integration_platforms(self.hass, DOMAIN, SUPPORTED_DOMAINS)
 
+    def gateways(self, host=None):
+        for gtw in self.hass.data[DOMAIN][CONF_GATEWAYS].values():
+            if not isinstance(gtw, ProGateway):
+                continue
+            if gtw.host == host or not host:
+                yield gtw
+
+    def find_device(self, target: dict, host=None):
+        eid = target.get('entity_id')
+        nid = target.get('node')
+        for gtw in self.gateways(host):
+            if nid is not None:
+                if dvc := gtw.devices.get(nid):
+                    return dvc
+                continue
+            for dvc in gtw.devices.values():
+                if ent := next((e for e in dvc.entities.values() if e.entity_id == eid), None):
+                    return ent.device
+        return None
+
     async def async_send_command(self, call):
         dat = call.data or {}
         gip = dat.get(CONF_HOST)
-        gtw = None
-        for g in self.hass.data[DOMAIN][CONF_GATEWAYS].values():
-            if not isinstance(gtw, ProGateway):
-                continue
-            if g.host == gip or not gip:
-                gtw = g
-                break
+        gtw = next(self.gateways(gip), None)
         if not gtw:
             _LOGGER.warning('Gateway %s not found.', gip)
             return False
@@ -204,16 +287,144 @@ class ComponentServices:
         })
         return rdt
 
+    async def async_capture(self, call):
+        """Start recording the frames of the gateways to JSONL files in the config dir, stopped after `duration`."""
+        dat = call.data or {}
+        gtws = list(self.gateways(dat.get(CONF_HOST)))
+        stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        if self._capturing:
+            await self.async_stop_capture()
+        for gtw in gtws:
+            path = self.hass.config.path(f'{DOMAIN}_capture_{gtw.host}_{stamp}.jsonl')
+            await gtw.start_capture(path)
+        self._capturing = gtws
+        self._capture_stop = self.hass.loop.call_later(
+            dat.get('duration', 60), lambda: self.hass.async_create_task(self.async_stop_capture()),
+        )
+
+    async def async_stop_capture(self):
+        """Stop the running capture and notify where the frames were written."""
+        if self._capture_stop:
+            self._capture_stop.cancel()
+            self._capture_stop = None
+        gtws, self._capturing = self._capturing, []
+        lines = []
+        for gtw in gtws:
+            if recorder := await gtw.stop_capture():
+                lines.append(f'{gtw.host}: {recorder.count} frames in `{recorder.path}`')
+        persistent_notification.async_create(
+            self.hass, '\n'.join(lines) or 'No gateway captured', 'Yeelight Pro capture', f'{DOMAIN}-capture',
+        )
+
+    async def async_profile(self, call):
+        """Start cProfile on the event loop, stopped and summarized after `duration`."""
+        dat = call.data or {}
+        if self._profiling:
+            await self.async_stop_profile()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as exc:
+            persistent_notification.async_create(
+                self.hass, f'Profiler not started: {exc}', 'Yeelight Pro profile', f'{DOMAIN}-profile',
+            )
+            return
+        self._profiling = (profiler, dat.get('top', 20))
+        self._profile_stop = self.hass.loop.call_later(
+            dat.get('duration', 30), lambda: self.hass.async_create_task(self.async_stop_profile()),
+        )
+
+    async def async_stop_profile(self):
+        """Stop the running profiler and notify the integration hot spots."""
+        if self._profile_stop:
+            self._profile_stop.cancel()
+            self._profile_stop = None
+        if not self._profiling:
+            return
+        (profiler, top), self._profiling = self._profiling, None
+        profiler.disable()
+        stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        path = self.hass.config.path(f'{DOMAIN}_profile_{stamp}.prof')
+        summary = await self.hass.async_add_executor_job(
+            profile_summary, profiler, path, top,
+        )
+        persistent_notification.async_create(
+            self.hass, f'Stats written to `{path}`\n\n```\n{summary}\n```',
+            'Yeelight Pro profile', f'{DOMAIN}-profile',
+        )
+
+    async def async_set_props(self, call):
+        """Encode attrs for many devices and send them in one frame per gateway."""
+        dat = call.data or {}
+        gip = dat.get(CONF_HOST)
+        frames = {}
+        results = []
+        for target in dat['targets']:
+            dvc = self.find_device(target, gip)
+            if not dvc or not (gtw := dvc.gateway):
+                results.append({**target, 'result': 'device not found'})
+                continue
+            payload = dvc.encode(target['values'])
+            if not payload:
+                results.append({**target, 'result': 'nothing to set'})
+                continue
+            method = 'device_set.prop' if gtw.pid == PID_WIFI_PANEL else 'gateway_set.prop'
+            nodes = frames.setdefault((gtw, method), {})
+            node = nodes.setdefault(dvc.id, {'id': dvc.id, 'nt': dvc.nt})
+            for k, v in payload.items():
+                if isinstance(v, dict) and isinstance(node.get(k), dict):
+                    node[k].update(v)
+                else:
+                    node[k] = v
+
+        for (gtw, method), nodes in frames.items():
+            rdt = await gtw.send(method, nodes=list(nodes.values()), wait_result=True)
+            replies = {}
+            if isinstance(rdt, dict):
+                replies = {n.get('id'): n for n in rdt.get('nodes') or [] if isinstance(n, dict)}
+            for nid, node in nodes.items():
+                results.append({
+                    'host': gtw.host,
+                    'node': nid,
+                    'payload': node,
+                    'result': replies.get(nid, rdt),
+                })
+
+        if dat.get('throw'):
+            persistent_notification.async_create(
+                self.hass, f'{results}', 'Yeelight Pro set props result', f'{DOMAIN}-debug',
+            )
+        self.hass.bus.async_fire(f'{DOMAIN}.set_props', {
+            'host': gip,
+            'results': results,
+        })
+        return {'results': results}
+
+
+PROFILE_FILTER = r'yeelight_pro[/\\](core[/\\](gateway|device)\.py|core[/\\]converters[/\\])'
+
+
+def profile_summary(profiler: cProfile.Profile, path: str, top: int = 20):
+    """Dump the stats to `path` and return the top functions of the gateway, devices and converters."""
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(PROFILE_FILTER, top)
+    lines = out.getvalue().splitlines()
+    start = next((i for i, line in enumerate(lines) if line.lstrip().startswith('ncalls')), 0)
+    return '\n'.join(line for line in lines[start:] if line.strip())
+
 
 class XEntity(Entity):
     added = False
     _attr_should_poll = False
+    optimistic_timeout = 5
 
     def __init__(self, device: XDevice, conv: Converter, option=None):
         self.device = device
         self.hass = device.hass
         self._name = conv.attr
-        self._option = (option or getattr(conv, 'option', {}))
+        self._option = (option or getattr(conv, 'option', None) or {})
         self._attr_name = self._option.get('name', f'{device.name} {conv.attr}'.strip())
         self._attr_unique_id = f'{device.id}-{conv.attr}'
         self.entity_id = device.entity_id(conv)
@@ -237,9 +448,16 @@ class XEntity(Entity):
         )
         self._attr_extra_state_attributes = {}
         self._vars = {}
+        self._known_state = {}
+        self._optimistic = {}
+        self._optimistic_handle = None
         self.subscribed_attrs = device.subscribe_attrs(conv)
         device.entities[conv.attr] = self
 
+    @property
+    def available(self):
+        return self.device.available
+
     async def async_added_to_hass(self):
         if hasattr(self, 'async_get_last_state'):
             state: State = await self.async_get_last_state()
@@ -248,6 +466,13 @@ class XEntity(Entity):
         self.added = True
         await super().async_added_to_hass()
 
+    async def async_will_remove_from_hass(self):
+        if self._optimistic_handle:
+            self._optimistic_handle.cancel()
+            self._optimistic_handle = None
+        self._optimistic.clear()
+        await super().async_will_remove_from_hass()
+
     @callback
     def async_restore_last_state(self, state: str, attrs: dict):
         """Restore previous state."""
@@ -261,10 +486,115 @@ class XEntity(Entity):
             if k not in data:
                 continue
             self._attr_extra_state_attributes[k] = data[k]
-        _LOGGER.info('%s: State changed: %s', self.entity_id, data)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('%s: State changed: %s', self.entity_id, data)
 
-    async def device_send_props(self, value: dict):
-        payload = self.device.encode(value)
-        if not payload:
-            return False
-        return await self.device.set_prop(**payload)
+    @callback
+    def async_push_state(self, data: dict):
+        """Apply state pushed by the device, reconciled with optimistic values."""
+        self._known_state.update(data)
+        if self._optimistic:
+            data = self.reconcile_state(data)
+            if not data:
+                return
+        if (trace := CURRENT_TRACE.get()) is None:
+            self.async_set_state(data)
+            if self.added:
+                self.async_write_ha_state()
+            return
+        start = time.perf_counter()
+        self.async_set_state(data)
+        mid = time.perf_counter()
+        trace.add('async_set_state', start, mid, entity=self.entity_id)
+        if self.added:
+            self.async_write_ha_state()
+            trace.add('async_write_ha_state', mid, entity=self.entity_id)
+
+    def reconcile_state(self, data: dict):
+        """Drop pushed values that confirm or predate pending optimistic values."""
+        data = dict(data)
+        now = time.monotonic()
+        for k, pending in list(self._optimistic.items()):
+            if k not in data:
+                continue
+            if data[k] == pending[0]:
+                # confirmed, the optimistic value is already shown
+                self._optimistic.pop(k)
+                data.pop(k)
+            elif now < pending[2]:
+                # stale or intermediate value, keep it for a possible rollback
+                pending[1] = data.pop(k)
+            else:
+                self._optimistic.pop(k)
+        if not self.subscribed_attrs.intersection(data):
+            return None
+        return data
+
+    @callback
+    def async_set_optimistic(self, value: dict, delay: float = 0):
+        """Show commanded values now and expect the device to confirm them in time."""
+        deadline = time.monotonic() + self.optimistic_timeout + delay
+        shown = None
+        if self.hass and any(k not in self._known_state for k in value):
+            # no device value to roll back to, keep the restored or unknown state shown now
+            if state := self.hass.states.get(self.entity_id):
+                shown = (state.state, dict(state.attributes))
+        for k, v in value.items():
+            if pending := self._optimistic.get(k):
+                shown = pending[3] or shown
+            self._optimistic[k] = [v, self._known_state.get(k), deadline, shown]
+        self.async_set_state(value)
+        if self.added:
+            self.async_write_ha_state()
+        if self.hass and not self._optimistic_handle:
+            self._optimistic_handle = self.hass.loop.call_later(
+                self.optimistic_timeout + delay, self.async_check_optimistic,
+            )
+
+    @callback
+    def async_check_optimistic(self):
+        self._optimistic_handle = None
+        now = time.monotonic()
+        expired = [k for k, pending in self._optimistic.items() if pending[2] <= now]
+        self.async_rollback(expired)
+        if self._optimistic and self.hass:
+            deadline = min(pending[2] for pending in self._optimistic.values())
+            self._optimistic_handle = self.hass.loop.call_later(
+                max(0, deadline - now), self.async_check_optimistic,
+            )
+
+    @callback
+    def async_rollback(self, attrs):
+        """Restore the last known device state for unconfirmed optimistic values.
+
+        Values the device never reported roll back to the state shown before
+        the optimistic write, the restored state or unknown.
+        """
+        state = {}
+        shown = None
+        unknown = False
+        for k in attrs:
+            if not (pending := self._optimistic.pop(k, None)):
+                continue
+            if pending[1] is not None:
+                state[k] = pending[1]
+            else:
+                unknown = True
+                shown = shown or pending[3]
+        if not state and not unknown:
+            return
+        _LOGGER.debug('%s: Rollback optimistic state: %s', self.entity_id, [state, shown])
+        if unknown:
+            self.async_restore_last_state(*(shown or (None, {})))
+        if state:
+            self.async_set_state(state)
+        if self.added:
+            self.async_write_ha_state()
+
+    async def device_send_props(self, value: dict, optimistic: dict = None, delay: float = 0):
+        if optimistic:
+            self.async_set_optimistic(optimistic, delay)
+        ret = await self.device.send_props(value)
+        if optimistic and not ret:
+            self.async_rollback(optimistic.keys())
+        return ret
@@ -17,14 +17,18 @@ _LOGGER = logging.getLogger(__name__)
 
 
 def setuper(add_entities):
-    def setup(device: XDevice, conv: Converter):
-        if not (entity := device.entities.get(conv.attr)):
-            if isinstance(conv, SceneConv):
-                entity = XSceneEntity(device, conv)
-            else:
-                entity = XButtonEntity(device, conv)
-        if not entity.added:
-            add_entities([entity])
+    def setup(device: XDevice, *convs: Converter):
+        entities = []
+        for conv in convs:
+            if not (entity := device.entities.get(conv.attr)):
+                if isinstance(conv, SceneConv):
+                    entity = XSceneEntity(device, conv)
+                else:
+                    entity = XButtonEntity(device, conv)
+            if not entity.added:
+                entities.append(entity)
+        if entities:
+            add_entities(entities)
     return setup
 
 
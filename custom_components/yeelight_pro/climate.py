@@ -84,7 +84,6 @@ class XClimateEntity(XEntity, ClimateEntity):
     @callback
     def async_set_state(self, data: dict):
         prefix = f"{self._channel}-"
-        has_update = False
         current_power = None
         current_mode = None
 
@@ -103,7 +102,6 @@ class XClimateEntity(XEntity, ClimateEntity):
                 if self._attr_hvac_mode != HVACMode.OFF:
                     self._attr_hvac_mode = HVACMode.OFF
                     self._attr_hvac_action = HVACAction.OFF
-                    has_update = True
             else:
                 if mode_key in data:
                     mode_value = data[mode_key]
@@ -116,14 +114,12 @@ class XClimateEntity(XEntity, ClimateEntity):
                     new_mode = mode_map.get(mode_value, HVACMode.COOL)
                     if self._attr_hvac_mode != new_mode:
                         self._attr_hvac_mode = new_mode
-                        has_update = True
                     self._last_mode = new_mode
                 else:
                     if self._attr_hvac_mode == HVACMode.OFF:
                         fallback_mode = self._last_mode or HVACMode.COOL
                         if self._attr_hvac_mode != fallback_mode:
                             self._attr_hvac_mode = fallback_mode
-                            has_update = True
         else:
             if mode_key in data:
                 mode_value = data[mode_key]
@@ -136,7 +132,6 @@ class XClimateEntity(XEntity, ClimateEntity):
                 new_mode = mode_map.get(mode_value, HVACMode.COOL)
                 if self._attr_hvac_mode != new_mode:
                     self._attr_hvac_mode = new_mode
-                    has_update = True
                 self._last_mode = new_mode
                 if self._last_power_state is False:
                     self._last_power_state = True
@@ -150,7 +145,6 @@ class XClimateEntity(XEntity, ClimateEntity):
             new_action = action_map.get(current_mode, HVACAction.IDLE)
             if self._attr_hvac_action != new_action:
                 self._attr_hvac_action = new_action
-                has_update = True
         elif current_power is True and current_mode is None and self._attr_hvac_mode != HVACMode.OFF:
             action_map_mode = {
                 HVACMode.COOL: HVACAction.COOLING,
@@ -160,11 +154,9 @@ class XClimateEntity(XEntity, ClimateEntity):
             new_action = action_map_mode.get(self._attr_hvac_mode, HVACAction.IDLE)
             if self._attr_hvac_action != new_action:
                 self._attr_hvac_action = new_action
-                has_update = True
         elif current_power is False:
             if self._attr_hvac_action != HVACAction.OFF:
                 self._attr_hvac_action = HVACAction.OFF
-                has_update = True
 
         temp_key = f"{prefix}act"
         if temp_key in data:
@@ -172,7 +164,6 @@ class XClimateEntity(XEntity, ClimateEntity):
             if isinstance(temp, (int, float)) and 16 <= temp <= 32:
                 if self._attr_current_temperature != temp:
                     self._attr_current_temperature = temp
-                    has_update = True
 
         target_temp_key = f"{prefix}actt"
         if target_temp_key in data:
@@ -180,17 +171,23 @@ class XClimateEntity(XEntity, ClimateEntity):
             if isinstance(temp, (int, float)) and 16 <= temp <= 32:
                 if self._attr_target_temperature != temp:
                     self._attr_target_temperature = temp
-                    has_update = True
 
         fan_key = f"{prefix}acf"
         if fan_key in data:
             fan_mode = data[fan_key]
             if fan_mode in self._attr_fan_modes and self._attr_fan_mode != fan_mode:
                 self._attr_fan_mode = fan_mode
-                has_update = True
 
-        if has_update:
-            self.async_write_ha_state()
+    @callback
+    def async_restore_last_state(self, state: str, attrs: dict):
+        if state in self._attr_hvac_modes:
+            self._attr_hvac_mode = HVACMode(state)
+        if action := attrs.get('hvac_action'):
+            self._attr_hvac_action = action
+        if (temp := attrs.get('temperature')) is not None:
+            self._attr_target_temperature = temp
+        if attrs.get('fan_mode') in self._attr_fan_modes:
+            self._attr_fan_mode = attrs['fan_mode']
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         prefix = f"{self._channel}-"
@@ -199,11 +196,7 @@ class XClimateEntity(XEntity, ClimateEntity):
         if hvac_mode == HVACMode.OFF:
             kwargs = {f"{prefix}acp": False}
             _LOGGER.debug('%s: Sending power off command: %s', self.entity_id, kwargs)
-            await self.device_send_props(kwargs)
-            
-            self._attr_hvac_mode = HVACMode.OFF
-            self._attr_hvac_action = HVACAction.OFF
-            self.async_write_ha_state()
+            await self.device_send_props(kwargs, optimistic=kwargs)
             
         else:
             mode_map = {
@@ -218,17 +211,7 @@ class XClimateEntity(XEntity, ClimateEntity):
                 f"{prefix}acm": mode_value
             }
             _LOGGER.debug('%s: Sending power on + mode command: %s', self.entity_id, kwargs)
-            await self.device_send_props(kwargs)
-            
-            self._attr_hvac_mode = hvac_mode
-            self._last_mode = hvac_mode
-            action_map = {
-                HVACMode.COOL: HVACAction.COOLING,
-                HVACMode.HEAT: HVACAction.HEATING,
-                HVACMode.FAN_ONLY: HVACAction.FAN,
-            }
-            self._attr_hvac_action = action_map.get(hvac_mode, HVACAction.IDLE)
-            self.async_write_ha_state()
+            await self.device_send_props(kwargs, optimistic=kwargs)
 
     async def async_set_temperature(self, **kwargs) -> None:
         prefix = f"{self._channel}-"
@@ -236,40 +219,29 @@ class XClimateEntity(XEntity, ClimateEntity):
         temperature = kwargs.get("temperature")
         if temperature is not None:
             _LOGGER.debug('%s: Setting temperature to: %s', self.entity_id, temperature)
-            await self.device_send_props({f"{prefix}actt": int(temperature)})
-            
-            self._attr_target_temperature = temperature
-            self.async_write_ha_state()
+            value = {f"{prefix}actt": int(temperature)}
+            await self.device_send_props(value, optimistic=value)
 
     async def async_set_fan_mode(self, fan_mode: str) -> None:
         prefix = f"{self._channel}-"
         _LOGGER.debug('%s: Setting fan mode to: %s', self.entity_id, fan_mode)
-        await self.device_send_props({f"{prefix}acf": fan_mode})
-        
-        self._attr_fan_mode = fan_mode
-        self.async_write_ha_state()
+        value = {f"{prefix}acf": fan_mode}
+        await self.device_send_props(value, optimistic=value)
 
     async def async_turn_on(self) -> None:
         prefix = f"{self._channel}-"
         _LOGGER.debug('%s: Turning on AC with default cool mode', self.entity_id)
-        await self.device_send_props({
+        value = {
             f"{prefix}acp": True,
             f"{prefix}acm": "cool"
-        })
-        
-        self._attr_hvac_mode = HVACMode.COOL
-        self._last_mode = HVACMode.COOL
-        self._attr_hvac_action = HVACAction.COOLING
-        self.async_write_ha_state()
+        }
+        await self.device_send_props(value, optimistic=value)
 
     async def async_turn_off(self) -> None:
         prefix = f"{self._channel}-"
         _LOGGER.debug('%s: Turning off AC', self.entity_id)
-        await self.device_send_props({f"{prefix}acp": False})
-        
-        self._attr_hvac_mode = HVACMode.OFF
-        self._attr_hvac_action = HVACAction.OFF
-        self.async_write_ha_state()
+        value = {f"{prefix}acp": False}
+        await self.device_send_props(value, optimistic=value)
 
     @property
     def hvac_action(self) -> HVACAction:
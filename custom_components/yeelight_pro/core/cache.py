@@ -0,0 +1,50 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """Size bounded LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default=None):
+        item = self.data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        if item[0] <= time.monotonic():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        self.data[key] = (time.monotonic() + self.ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        item = self.data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def stats(self):
+        return {
+            'size': len(self.data),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+from .trace import IN
+
+if TYPE_CHECKING:
+    from .gateway import ProGateway
+
+
+class CaptureRecorder:
+    """Record the frames of a gateway session to a JSONL file.
+
+    Each line is `[offset, direction, frame]`, with offset in seconds since
+    the recording started. Lines are buffered in memory, `take` them on the
+    event loop and `write` them in an executor, it does blocking file I/O.
+    """
+
+    def __init__(self, path: str, flush_size: int = 500):
+        self.path = path
+        self.flush_size = flush_size
+        self.started = time.monotonic()
+        self.lines: List[str] = []
+        self.count = 0
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+
+    def record(self, direction: str, raw: bytes):
+        frame = raw.decode(errors='replace').rstrip('\r\n')
+        offset = round(time.monotonic() - self.started, 6)
+        self.lines.append(json.dumps([offset, direction, frame], ensure_ascii=False))
+        self.count += 1
+
+    @property
+    def should_flush(self):
+        return len(self.lines) >= self.flush_size
+
+    def take(self):
+        lines, self.lines = self.lines, []
+        return lines
+
+    def write(self, lines: List[str]):
+        if not lines:
+            return
+        with open(self.path, 'a', encoding='utf-8') as fp:
+            fp.write('\n'.join(lines) + '\n')
+
+    def flush(self):
+        self.write(self.take())
+
+
+def read_capture(path: str, direction: str = IN) -> Iterator[Tuple[float, bytes]]:
+    """Yield `(offset, raw frame)` of the recorded frames in one direction."""
+    with open(path, encoding='utf-8') as fp:
+        for line in fp:
+            if not (line := line.strip()):
+                continue
+            offset, dirt, frame = json.loads(line)
+            if dirt == direction:
+                yield offset, frame.encode() + b'\r\n'
+
+
+async def replay(gateway: "ProGateway", frames, speed: float = 1.0):
+    """Feed recorded frames into `gateway.on_message`.
+
+    `speed` 1 keeps the recorded timing, N plays N times faster and 0 plays
+    as fast as possible. Returns the number of frames and the elapsed time.
+    """
+    start = time.monotonic()
+    count = 0
+    for offset, raw in frames:
+        if speed > 0 and (delay := offset / speed - (time.monotonic() - start)) > 0:
+            await asyncio.sleep(delay)
+        await gateway.on_message(raw)
+        count += 1
+    await gateway.settle()
+    return count, time.monotonic() - start
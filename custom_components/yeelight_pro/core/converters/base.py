@@ -1,4 +1,3 @@
-from dataclasses import dataclass
 from typing import Any, Optional, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -10,22 +9,56 @@ __all__ = [
     'BrightnessConv', 'ColorTempKelvin', 'ColorRgbConv',
     'EventConv', 'MotorConv', 'CoverPositionConv', 'CoverStateConv',
     'TiltAngleConv', 'SceneConv',
-    'BathHeaterModeConv',
+    'BathHeaterModeConv', 'NumberConv',
 ]
 
 
-@dataclass
 class Converter:
-    attr: str  
-    domain: Optional[str] = None 
-
-    prop: Optional[str] = None
-    parent: Optional[str] = None
-
-    enabled: Optional[bool] = True  
-    poll: bool = False  
-
-    childs = None 
+    __slots__ = ('attr', 'domain', 'prop', 'parent', 'enabled', 'poll', 'option', 'childs', 'frozen')
+
+    def __init__(self, attr: str, domain: Optional[str] = None, prop: Optional[str] = None,
+                 parent: Optional[str] = None, enabled: Optional[bool] = True, poll: bool = False,
+                 option: Optional[dict] = None, childs: Optional[set] = None):
+        self.attr = attr
+        self.domain = domain
+        self.prop = prop
+        self.parent = parent
+        self.enabled = enabled
+        self.poll = poll
+        self.option = option
+        self.childs = childs
+
+    def __setattr__(self, name, value):
+        if getattr(self, 'frozen', False):
+            raise AttributeError(f'Converter {self.attr} is shared and read-only, use replace()')
+        object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        fields = [k for k in self.fields() if k != 'frozen']
+        return '%s(%s)' % (type(self).__name__, ', '.join(f'{k}={getattr(self, k)!r}' for k in fields))
+
+    def fields(self):
+        fields = []
+        for cls in type(self).__mro__:
+            for k in getattr(cls, '__slots__', ()):
+                if k not in fields and hasattr(self, k):
+                    fields.append(k)
+        return fields
+
+    def freeze(self):
+        """Make the converter read-only, it is about to be shared between devices."""
+        object.__setattr__(self, 'frozen', True)
+        return self
+
+    def replace(self, **changes):
+        """Writable copy with `changes` applied."""
+        conv = object.__new__(type(self))
+        for k in self.fields():
+            if k != 'frozen':
+                object.__setattr__(conv, k, getattr(self, k))
+        for k, v in changes.items():
+            setattr(conv, k, v)
+        return conv
 
     def decode(self, device: "XDevice", payload: dict, value: Any):
         payload[self.attr] = value
@@ -39,6 +72,8 @@ class Converter:
 
 
 class BoolConv(Converter):
+    __slots__ = ()
+
     def decode(self, device: "XDevice", payload: dict, value: Union[bool, int]):
         payload[self.attr] = bool(value)
 
@@ -46,24 +81,30 @@ class BoolConv(Converter):
         super().encode(device, payload, bool(value))
 
 
-@dataclass
 class MapConv(Converter):
-    map: dict = None
+    __slots__ = ('map', 'rmap')
+
+    def __init__(self, *args, map: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.map = map
+        self.rmap = {v: k for k, v in map.items()} if map else {}
 
     def decode(self, device: "XDevice", payload: dict, value: Union[str, int]):
         payload[self.attr] = self.map.get(value)
 
     def encode(self, device: "XDevice", payload: dict, value: Any):
-        value = next(k for k, v in self.map.items() if v == value)
-        super().encode(device, payload, value)
+        super().encode(device, payload, self.rmap[value])
 
 
-@dataclass
 class DurationConv(Converter):
-    min: float = 0
-    max: float = 3600
-    step: float = 1
-    readable: bool = True
+    __slots__ = ('min', 'max', 'step', 'readable')
+
+    def __init__(self, *args, min: float = 0, max: float = 3600, step: float = 1, readable: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min = min
+        self.max = max
+        self.step = step
+        self.readable = readable
 
     def decode(self, device: "XDevice", payload: dict, value: Union[int, float, str, None]):
         if self.readable and value is not None:
@@ -75,20 +116,35 @@ class DurationConv(Converter):
 
 
 class PropConv(Converter):
-    pass
+    __slots__ = ()
 
 
 class PropBoolConv(BoolConv, PropConv):
-    pass
+    __slots__ = ()
 
 
 class PropMapConv(MapConv, PropConv):
-    pass
+    __slots__ = ()
+
+
+class NumberConv(PropConv):
+    __slots__ = ('min', 'max', 'step')
+
+    def __init__(self, *args, min: float = None, max: float = None, step: float = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        if min is not None:
+            self.min = min
+        if max is not None:
+            self.max = max
+        self.step = step
 
 
-@dataclass
 class BrightnessConv(PropConv):
-    max: float = 100.0
+    __slots__ = ('max',)
+
+    def __init__(self, *args, max: float = 100.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max = max
 
     def decode(self, device: "XDevice", payload: dict, value: int):
         payload[self.attr] = round(value / self.max * 255.0)
@@ -98,10 +154,13 @@ class BrightnessConv(PropConv):
         super().encode(device, payload, int(value))
 
 
-@dataclass
 class ColorTempKelvin(PropConv):
-    mink: int = 2700
-    maxk: int = 6500
+    __slots__ = ('mink', 'maxk')
+
+    def __init__(self, *args, mink: int = 2700, maxk: int = 6500, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mink = mink
+        self.maxk = maxk
 
     def decode(self, device: "XDevice", payload: dict, value: int):
         payload[self.attr] = int(1000000.0 / value)
@@ -117,6 +176,8 @@ class ColorTempKelvin(PropConv):
 
 
 class ColorRgbConv(PropConv):
+    __slots__ = ()
+
     def decode(self, device: "XDevice", payload: dict, value: int):
         red = (value >> 16) & 0xFF
         green = (value >> 8) & 0xFF
@@ -128,9 +189,12 @@ class ColorRgbConv(PropConv):
         super().encode(device, payload, value)
 
 
-@dataclass
 class EventConv(Converter):
-    event: str = ''
+    __slots__ = ('event',)
+
+    def __init__(self, *args, event: str = '', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.event = event
 
     def decode(self, device: "XDevice", payload: dict, value: dict):
         key, val = self.attr, None
@@ -173,9 +237,12 @@ class EventConv(Converter):
         super().encode(device, payload, value)
 
 
-@dataclass
 class MotorConv(Converter):
-    readable: bool = False
+    __slots__ = ('readable',)
+
+    def __init__(self, *args, readable: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.readable = readable
 
     def decode(self, device: "XDevice", payload: dict, value: Any):
         if isinstance(value, dict):
@@ -210,10 +277,13 @@ class MotorConv(Converter):
             })
 
 
-@dataclass  
 class CoverPositionConv(PropConv):
-    min: int = 0
-    max: int = 100
+    __slots__ = ('min', 'max')
+
+    def __init__(self, *args, min: int = 0, max: int = 100, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min = min
+        self.max = max
 
     def decode(self, device: "XDevice", payload: dict, value: int):
         payload[self.attr] = value
@@ -226,30 +296,32 @@ class CoverPositionConv(PropConv):
         super().encode(device, payload, value)
 
 
-@dataclass
 class CoverStateConv(PropConv):
-    pass
+    __slots__ = ()
+
 
+class BathHeaterModeConv(PropMapConv):
+    __slots__ = ()
 
-class BathHeaterModeConv(PropConv):
     def __init__(self):
-        super().__init__('heater_mode', 'select', prop='bhm', parent='heater_power')
-        self.map = {
-            0: '关闭',
-            1: '智能干燥',
-            2: '恒温除雾',
-            3: '快速除雾',
-            4: '极速加热',
-        }
-        self.childs = set()
-        self.option = {'name': '快速模式'}
+        super().__init__(
+            'heater_mode', 'select', prop='bhm', parent='heater_power',
+            map={
+                0: '关闭',
+                1: '智能干燥',
+                2: '恒温除雾',
+                3: '快速除雾',
+                4: '极速加热',
+            },
+            childs=set(),
+            option={'name': '快速模式'},
+        )
 
     def decode(self, device: "XDevice", payload: dict, value: int):
         payload[self.attr] = self.map.get(value, '关闭')
 
     def encode(self, device: "XDevice", payload: dict, value: str):
-        rev = {v: k for k, v in self.map.items()}
-        code = rev.get(value, 0)
+        code = self.rmap.get(value, 0)
         if code == 0:
             payload['p'] = False
         else:
@@ -258,10 +330,13 @@ class BathHeaterModeConv(PropConv):
     
 
 
-@dataclass
 class TiltAngleConv(PropConv):
-    min: int = 0
-    max: int = 180
+    __slots__ = ('min', 'max')
+
+    def __init__(self, *args, min: int = 0, max: int = 180, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min = min
+        self.max = max
 
     def decode(self, device: "XDevice", payload: dict, value: int):
         payload[self.attr] = int(value)
@@ -276,9 +351,12 @@ class TiltAngleConv(PropConv):
         super().encode(device, payload, int(value))
 
 
-@dataclass
 class SceneConv(Converter):
-    node: dict = None
+    __slots__ = ('node',)
+
+    def __init__(self, *args, node: dict = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.node = node
 
 
 from .climate import (
@@ -11,6 +11,8 @@ from .base import PropConv
 
 class AirConditionPowerConv(PropConv):
     
+    __slots__ = ('index', 'prefix')
+
     def __init__(self, index: int = 1):
         self.index = index
         self.prefix = f"{index}-"
@@ -28,6 +30,8 @@ class AirConditionPowerConv(PropConv):
 class AirConditionModeConv(PropConv):
 
     
+    __slots__ = ('index', 'prefix')
+
     def __init__(self, index: int = 1):
         self.index = index
         self.prefix = f"{index}-"
@@ -54,10 +58,12 @@ class AirConditionModeConv(PropConv):
 
 class AirConditionCurrentTempConv(PropConv):
     
+    __slots__ = ('index', 'prefix')
+
     def __init__(self, index: int = 1):
         self.index = index
         self.prefix = f"{index}-"
-        super().__init__(f"{self.prefix}act", "climate", parent=f"{self.prefix}acp")
+        super().__init__(f"{self.prefix}act", "climate", parent=f"{self.prefix}acp", poll=True)
         
     def decode(self, device: "XDevice", payload: dict, value: int):
         _LOGGER.debug('AC Current Temp decode: %s = %s', self.attr, value)
@@ -67,6 +73,8 @@ class AirConditionCurrentTempConv(PropConv):
 
 class AirConditionTargetTempConv(PropConv):
     
+    __slots__ = ('index', 'prefix')
+
     def __init__(self, index: int = 1):
         self.index = index
         self.prefix = f"{index}-"
@@ -89,6 +97,8 @@ class AirConditionTargetTempConv(PropConv):
 
 class AirConditionFanSpeedConv(PropConv):
     
+    __slots__ = ('index', 'prefix')
+
     def __init__(self, index: int = 1):
         self.index = index
         self.prefix = f"{index}-"
@@ -113,10 +123,12 @@ class AirConditionFanSpeedConv(PropConv):
         super().encode(device, payload, speed_map.get(value, 2))
 
 class AirConditionCurrentTempSensorAcctConv(PropConv):
-    def __init__(self, index: int = 1):
+    __slots__ = ('index', 'prefix')
+
+    def __init__(self, index: int = 1, option: dict = None):
         self.index = index
         self.prefix = f"{index}-"
-        super().__init__(f"temperature{index}", "sensor", prop=f"{self.prefix}acct")
+        super().__init__(f"temperature{index}", "sensor", prop=f"{self.prefix}acct", poll=True, option=option)
 
     def decode(self, device: "XDevice", payload: dict, value: int):
         _LOGGER.debug('AC Sensor Acct Temp decode: %s = %s', self.attr, value)
@@ -2,6 +2,8 @@ from .base import Converter
 from ..const import *
 
 class CoverConverter(Converter):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("cover")
     
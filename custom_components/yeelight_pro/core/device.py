@@ -1,10 +1,13 @@
 import asyncio
 import logging
+import time
 from enum import IntEnum
+from types import MappingProxyType
 from .converters.base import *
 from .converters.base import TiltAngleConv
+from .tracing import CURRENT_TRACE
 
-from typing import Dict, List, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .. import XEntity
@@ -12,7 +15,7 @@ if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
 
 from homeassistant.components.light import ColorMode
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import EntityCategory, UnitOfTemperature, UnitOfTime
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -50,6 +53,13 @@ class DeviceType(IntEnum):
     AUDIO_DEVICE = 30
 
 
+NODE_TYPE_GROUPS = [
+    NodeType.ROOM,
+    NodeType.GROUP,
+    NodeType.MRSH_GROUP,
+    NodeType.HOME,
+]
+
 DEVICE_TYPE_LIGHTS = [
     DeviceType.LIGHT,
     DeviceType.LIGHT_WITH_BRIGHTNESS,
@@ -59,28 +69,152 @@ DEVICE_TYPE_LIGHTS = [
 ]
 
 
+DEVICE_CLASSES: Dict[object, Callable[[dict], "XDevice"]] = {}
+
+
+def register_device(*types, pt=None):
+    """Register a device class or factory for node types, optionally only for one pt (model)."""
+    def decorator(factory):
+        for typ in types:
+            DEVICE_CLASSES[typ if pt is None else (typ, pt)] = factory
+        return factory
+    return decorator
+
+
+def device_factory(node: dict):
+    typ = node.get('type', node.get('pt', 0))
+    return DEVICE_CLASSES.get((typ, node.get('pt'))) or DEVICE_CLASSES.get(typ)
+
+
+def deep_merge(dst: dict, src: dict):
+    for k, v in src.items():
+        if isinstance(v, dict) and isinstance(dst.get(k), dict):
+            deep_merge(dst[k], v)
+        else:
+            dst[k] = v
+    return dst
+
+
+class PropStore(dict):
+    """Node props whose `params` are deep merged across partial frames.
+
+    `version` is the schema version, it only bumps when a frame carries a
+    params key that was never seen before.
+    """
+    __slots__ = ('version',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def changes_schema(self, data: dict):
+        """Whether merging the frame would bump the schema version."""
+        if not isinstance(v := data.get('params'), dict):
+            return False
+        if not isinstance(params := self.get('params'), dict):
+            return bool(v)
+        return not v.keys() <= params.keys()
+
+    def merge(self, data: dict):
+        """Merge a frame, return True if the schema version changed."""
+        new = False
+        for k, v in data.items():
+            if k != 'params' or not isinstance(v, dict):
+                self[k] = v
+                continue
+            if not isinstance(params := self.get('params'), dict):
+                params = self['params'] = {}
+            if not new and not v.keys() <= params.keys():
+                new = True
+            deep_merge(params, v)
+        if new:
+            self.version += 1
+        return new
+
+
+CONVERTER_SETS: Dict[tuple, "MappingProxyType[str, Converter]"] = {}
+ENCODE_PLANS: Dict[tuple, Dict[str, tuple]] = {}
+
+
+def clear_converter_sets():
+    """Drop the shared converter sets and plans, devices keep the ones they use."""
+    CONVERTER_SETS.clear()
+    ENCODE_PLANS.clear()
+
+
+def compile_plan(converters: Dict[str, Converter]) -> Dict[str, tuple]:
+    """Map each attribute to its converter and the payload key it encodes into."""
+    return {
+        attr: (conv, 'set' if isinstance(conv, PropConv) else None)
+        for attr, conv in converters.items()
+    }
+
+
 class XDevice:
-    hass: "HomeAssistant" = None
-    converters: Dict[str, Converter] = None
+    __slots__ = (
+        'id', 'nt', 'pid', 'type', 'pt', 'name', 'prop', 'entities', 'gateways',
+        'converters', 'plan', 'command_slots', 'command_waiters', 'command_task',
+        'pushed_at', 'updated_at', 'available_state', 'hass',
+    )
+    stale_check = True
 
     def __init__(self, node: dict):
+        self.hass: "HomeAssistant" = None
         self.id = int(node['id'])
         self.nt = node.get('nt', 0)
         self.pid = node.get('pid')
         self.type = node.get('type', node.get('pt', 0))
         self.pt = node.get('pt')
         self.name = node.get('n', '')
-        self.prop = {}
+        self.prop = PropStore()
         self.entities: Dict[str, "XEntity"] = {}
         self.gateways: List["ProGateway"] = []
-        self.converters = {}
-        self.setup_converters()
+        self.converters: Dict[str, Converter] = {}
+        self.plan: Optional[Dict[str, tuple]] = None
+        self.command_slots: Dict[str, Any] = {}
+        self.command_waiters: List[asyncio.Future] = []
+        self.command_task: Optional[asyncio.Task] = None
+        self.pushed_at: Dict[str, float] = {}
+        self.updated_at = time.monotonic()
+        self.available_state = None
+        self.build_converters()
 
     def setup_converters(self):
         pass
 
+    def converters_key(self):
+        """Key of devices that end up with the same converters, None if they can't be shared."""
+        return type(self), self.type, self.pt, frozenset(self.prop_params)
+
+    def build_converters(self):
+        """Set up converters, devices of the same shape share one immutable converter set."""
+        if (key := self.converters_key()) is None:
+            self.setup_converters()
+            self.plan = None
+            return
+        if (convs := CONVERTER_SETS.get(key)) is None:
+            self.converters = {}
+            self.setup_converters()
+            for conv in self.converters.values():
+                conv.freeze()
+            convs = CONVERTER_SETS[key] = MappingProxyType(self.converters)
+            ENCODE_PLANS[key] = compile_plan(convs)
+        self.converters = convs
+        self.plan = ENCODE_PLANS[key]
+
+    @property
+    def encode_plan(self) -> Dict[str, tuple]:
+        if self.plan is None:
+            self.plan = compile_plan(self.converters)
+        return self.plan
+
     def add_converter(self, conv: Converter):
         self.converters[conv.attr] = conv
+        self.plan = None
+
+    def remove_converter(self, attr: str):
+        self.plan = None
+        return self.converters.pop(attr, None)
 
     def add_converters(self, *args: Converter):
         for conv in args:
@@ -88,48 +222,39 @@ class XDevice:
 
     @staticmethod
     async def from_node(gateway: "ProGateway", node: dict):
-        if node.get('nt') not in [NodeType.MESH, NodeType.MRSH_GROUP, NodeType.SCENE]:
+        if node.get('nt') not in [NodeType.MESH, NodeType.SCENE, *NODE_TYPE_GROUPS]:
             return None
         if not (nid := node.get('id')):
             return None
         if dvc := gateway.devices.get(nid):
             if n := node.get('n'):
                 dvc.name = n
-        else:
-            dvc = XDevice(node)
-            if dvc.nt in [NodeType.SCENE]:
-                if isinstance(gateway.device, GatewayDevice):
-                    await gateway.device.add_scene(node)
-                return gateway.device
-            elif dvc.type in DEVICE_TYPE_LIGHTS:
-                dvc = LightDevice(node)
-            elif dvc.type in [DeviceType.SWITCH_PANEL]:
-                dvc = SwitchPanelDevice(node)
-            elif dvc.type in [DeviceType.RELAY_DOUBLE]:
-                dvc = RelayDoubleDevice(node)
-            elif dvc.type in [DeviceType.SWITCH_SENSOR]:
-                dvc = KnobDevice(node)                  
-            elif dvc.type in [DeviceType.KNOB]:
-                dvc = KnobDevice(node)
-            elif dvc.type in [DeviceType.MOTION_SENSOR, DeviceType.MOTION_WITH_LIGHT]:
-                dvc = MotionDevice(node)
-            elif dvc.type in [DeviceType.MAGNET_SENSOR]:
-                dvc = ContactDevice(node)
-            elif dvc.type in [DeviceType.CURTAIN]:
-                dvc = CoverDevice(node)
-            elif dvc.type in [DeviceType.BATH_HEATER]:
-                dvc = BathHeaterDevice(node)
-            elif dvc.type in [DeviceType.VRF, DeviceType.AIR_CONDITIONER]:
-                dvc = AirConditionDevice(node)
-            elif dvc.type in [DeviceType.SIMPLE_SWITCH, 18]:
-                dvc = SimpleSwitchDevice(node)               
-            elif dvc.type in [DeviceType.AUDIO_DEVICE, 30]:
-                dvc = AudioDevice(node)
+            if isinstance(dvc, GroupDevice) and 'nodes' in node:
+                dvc.members = GroupDevice.node_ids(node['nodes'])
+                gateway.index_group(dvc)
+        elif node.get('nt') in NODE_TYPE_GROUPS:
+            if node.get('nt') in [NodeType.ROOM, NodeType.HOME]:
+                dvc = LightGroupDevice(node)
+            elif node.get('type', node.get('pt', 0)) in DEVICE_TYPE_LIGHTS:
+                dvc = LightGroupDevice(node)
             else:
-                _LOGGER.warning('Unsupported device: %s', node)
-                return None
+                dvc = SwitchGroupDevice(node)
+            await gateway.add_device(dvc)
+            await gateway.get_node(dvc.id, wait_result=True)
+        elif node.get('nt') == NodeType.SCENE:
+            if isinstance(gateway.device, GatewayDevice):
+                await gateway.device.add_scene(node)
+            return gateway.device
+        elif factory := device_factory(node):
+            dvc = factory(node)
             await gateway.add_device(dvc)
             await gateway.get_node(dvc.id, wait_result=True)
+        else:
+            typ = node.get('type', node.get('pt', 0))
+            if typ not in gateway.unsupported.values():
+                _LOGGER.warning('Unsupported device: %s', node)
+            gateway.unsupported[int(nid)] = typ
+            return None
         return dvc
 
     @staticmethod
@@ -141,33 +266,55 @@ class XDevice:
             dls.append(dvc)
         return dls
 
-    async def prop_changed(self, data: dict):
-        has_new = False
-        if 'params' in data:
-            oldp = self.prop_params
-            for k in (data.get('params') or {}).keys():
-                if k not in oldp:
-                    has_new = True
-                    break
-        else:
-            for k in data.keys():
-                if k not in self.prop:
-                    has_new = True
-                    break
-        self.prop.update(data)
-        if has_new:
-            self.setup_converters()
+    def touch(self, data: dict, pushed=True):
+        now = self.updated_at = time.monotonic()
+        if pushed:
+            for k in data.get('params') or {}:
+                self.pushed_at[k] = now
+
+    def prop_updated(self, data: dict, pushed=True):
+        """Apply a frame inline, False if it changes the schema and needs `prop_changed`."""
+        if self.prop.changes_schema(data):
+            return False
+        self.touch(data, pushed)
+        self.prop.merge(data)
+        self.apply_state(data)
+        return True
+
+    async def prop_changed(self, data: dict, pushed=True):
+        self.touch(data, pushed)
+        if self.prop.merge(data):
+            self.build_converters()
             await self.setup_entities()
             for ent in self.entities.values():
                 conv = self.converters.get(ent._name)
                 if conv:
                     ent.subscribed_attrs = self.subscribe_attrs(conv)
-        self.update(self.decode(data))
+        self.apply_state(data)
+
+    def apply_state(self, data: dict, event=False):
+        """Decode a frame and update the entities, traced when a trace is active."""
+        decode = self.decode_event if event else self.decode
+        if (trace := CURRENT_TRACE.get()) is None:
+            decoded = decode(data)
+            self.update(decoded)
+            return decoded
+        start = time.perf_counter()
+        decoded = decode(data)
+        mid = time.perf_counter()
+        trace.add('decode', start, mid, node=self.id)
+        self.update(decoded)
+        trace.add('update', mid, node=self.id)
+        return decoded
+
+    def fire_event(self, data: dict):
+        self.updated_at = time.monotonic()
+        decoded = self.apply_state(data, event=True)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('Event fired: %s', [data, decoded])
 
     async def event_fired(self, data: dict):
-        decoded = self.decode_event(data)
-        self.update(decoded)
-        _LOGGER.debug('Event fired: %s', [data, decoded])
+        self.fire_event(data)
 
     @property
     def gateway(self):
@@ -179,6 +326,16 @@ class XDevice:
     def online(self):
         return self.prop.get('o')
 
+    @property
+    def available(self):
+        if not (gateway := self.gateway) or not gateway.connected:
+            return False
+        if self.online is False:
+            return False
+        if self.stale_check and gateway.stale_timeout:
+            return time.monotonic() - self.updated_at <= gateway.stale_timeout
+        return True
+
     @property
     def firmware_version(self):
         return self.prop.get('fv')
@@ -236,15 +393,15 @@ class XDevice:
         return payload
 
     def encode(self, value: dict) -> dict:
+        """Encode attrs in converter order, a later converter wins when two write the same key."""
         payload = {}
-        for conv in self.converters.values():
-            if conv.attr not in value:
+        plan = self.encode_plan
+        attrs = [attr for attr in plan if attr in value] if len(value) > 1 else value
+        for attr in attrs:
+            if (step := plan.get(attr)) is None:
                 continue
-            if isinstance(conv, PropConv):
-                dat = payload.setdefault('set', {})
-            else:
-                dat = payload
-            conv.encode(self, dat, value[conv.attr])
+            conv, key = step
+            conv.encode(self, payload.setdefault(key, {}) if key else payload, value[attr])
         return payload
 
     def encode_read(self, attrs: set) -> dict:
@@ -263,14 +420,50 @@ class XDevice:
         for entity in self.entities.values():
             if not (entity.subscribed_attrs & attrs):
                 continue
-            entity.async_set_state(value)
-            if entity.added:
-                entity.async_write_ha_state()
+            entity.async_push_state(value)
 
     async def get_node(self):
         if not self.gateway:
             return None
-        return await self.gateway.send('gateway_get.node', params={'id': self.id})
+        return await self.gateway.get_node(self.id)
+
+    async def send_props(self, value: dict):
+        """Encode and send attrs, a newer value for an attr replaces a not yet sent one.
+
+        Attrs pending at the same time are merged into one frame. Only absolute
+        writes (`set`) are coalesced, actions like a motor stop are sent right
+        away and drop the pending writes of their attrs and child attrs.
+        """
+        payload = self.encode(value)
+        if payload.keys() - {'set'}:
+            for attr in list(self.command_slots):
+                conv = self.converters.get(attr)
+                if attr in value or (conv and conv.parent in value):
+                    del self.command_slots[attr]
+            return await self.set_prop(**payload)
+        self.command_slots.update(value)
+        fut = asyncio.get_event_loop().create_future()
+        self.command_waiters.append(fut)
+        if not self.command_task:
+            self.command_task = asyncio.create_task(self.drain_command_slots())
+        return await asyncio.shield(fut)
+
+    async def drain_command_slots(self):
+        try:
+            while self.command_waiters:
+                value, self.command_slots = self.command_slots, {}
+                waiters, self.command_waiters = self.command_waiters, []
+                try:
+                    payload = self.encode(value)
+                    res = await self.set_prop(**payload) if payload else False
+                except Exception as exc:
+                    for fut in waiters:
+                        fut.set_exception(exc)
+                else:
+                    for fut in waiters:
+                        fut.set_result(res)
+        finally:
+            self.command_task = None
 
     async def set_prop(self, **kwargs):
         if not self.gateway:
@@ -285,6 +478,12 @@ class XDevice:
 
 
 class GatewayDevice(XDevice):
+    __slots__ = ()
+    stale_check = False
+
+    def converters_key(self):
+        return None
+
     def __init__(self, gateway: "ProGateway"):
         super().__init__({
             'id': 0,
@@ -295,17 +494,64 @@ class GatewayDevice(XDevice):
         self.id = gateway.host
         self.name = 'Yeelight Pro'
 
+    def setup_converters(self):
+        super().setup_converters()
+        diagnostic = {'category': EntityCategory.DIAGNOSTIC, 'icon': 'mdi:lan'}
+        self.add_converters(
+            Converter('frames_in', 'sensor', option={**diagnostic, 'name': 'Frames received'}),
+            Converter('frames_out', 'sensor', option={**diagnostic, 'name': 'Frames sent'}),
+            Converter('rtt', 'sensor', option={
+                **diagnostic, 'name': 'Command RTT', 'class': 'duration', 'unit': UnitOfTime.MILLISECONDS,
+            }),
+            Converter('timeouts', 'sensor', option={**diagnostic, 'name': 'Command timeouts'}),
+            Converter('reconnects', 'sensor', option={**diagnostic, 'name': 'Reconnects'}),
+            Converter('pending', 'sensor', option={**diagnostic, 'name': 'Queued messages'}),
+        )
+
     async def add_scene(self, node: dict):
-        if not (nid := node.get('id')):
-            return
-        self.add_converter(SceneConv(f'scene_{nid}', 'button', node=node))
-        await self.setup_entities()
+        await self.load_scenes([node])
+
+    async def load_scenes(self, nodes: List[dict], complete=False):
+        """Diff scene nodes against the scene converters and register new ones in one batch.
+
+        With `complete` the nodes are the full scene list and missing scenes are removed.
+        """
+        added = []
+        seen = set()
+        for node in nodes:
+            if not (nid := node.get('id')):
+                continue
+            attr = f'scene_{nid}'
+            seen.add(attr)
+            if not (conv := self.converters.get(attr)):
+                conv = SceneConv(attr, 'button', node=node)
+                self.add_converter(conv)
+                added.append(conv)
+                continue
+            if conv.node.get('n') == node.get('n'):
+                continue
+            self.add_converter(conv.replace(node=node))
+            if ent := self.entities.get(attr):
+                ent._attr_name = node.get('n') or attr
+                if ent.added:
+                    ent.async_write_ha_state()
+        if complete:
+            for attr in [a for a in self.converters if a.startswith('scene_') and a not in seen]:
+                self.remove_converter(attr)
+                if (ent := self.entities.pop(attr, None)) and ent.added:
+                    self.hass.async_create_task(ent.async_remove())
+        if added and (gateway := self.gateway):
+            await gateway.setup_entity('button', self, *added)
+        return added
 
     def entity_id(self, conv: Converter):
         return f'{conv.domain}.yp_{conv.attr}'
 
 
+@register_device(*DEVICE_TYPE_LIGHTS)
 class LightDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         self.add_converter(PropBoolConv('light', 'light', prop='p'))
@@ -338,13 +584,83 @@ class LightDevice(XDevice):
         return modes
 
 
+class GroupDevice(XDevice):
+    """Group, room or home node, commanded with a single frame handled by the mesh."""
+    __slots__ = ('members',)
+    stale_check = False
+
+    def __init__(self, node: dict):
+        if not node.get('type', node.get('pt')):
+            node = {**node, 'type': NodeType(node.get('nt')).name.lower()}
+        super().__init__(node)
+        self.members = self.node_ids(node.get('nodes'))
+
+    @staticmethod
+    def node_ids(nodes):
+        ids = set()
+        for n in nodes or []:
+            if isinstance(n, dict):
+                n = n.get('id')
+            if n:
+                ids.add(int(n))
+        return ids
+
+    @staticmethod
+    def member_on(params: dict):
+        if params.get('p'):
+            return True
+        return any(v for k, v in params.items() if k.endswith(('-p', '-sp')))
+
+    def members_state(self):
+        if not (gateway := self.gateway):
+            return None
+        states = [
+            dvc.prop_params
+            for m in self.members
+            if (dvc := gateway.devices.get(m)) and dvc.prop_params
+        ]
+        if not states:
+            return None
+        params = {'p': any(self.member_on(s) for s in states)}
+        levels = [s['l'] for s in states if s.get('p') and 'l' in s]
+        if levels:
+            params['l'] = max(levels)
+        return params
+
+    def member_changed(self):
+        """Derive the group state from the latest member pushes."""
+        if params := self.members_state():
+            self.update(self.decode({'params': params}))
+
+
+class SwitchGroupDevice(GroupDevice):
+    __slots__ = ()
+
+    def setup_converters(self):
+        super().setup_converters()
+        self.add_converter(PropBoolConv('switch', 'switch', prop='p'))
+
+
+class LightGroupDevice(GroupDevice, LightDevice):
+    __slots__ = ()
+    @property
+    def color_modes(self):
+        if self.nt in [NodeType.ROOM, NodeType.HOME]:
+            return {ColorMode.ONOFF, ColorMode.BRIGHTNESS}
+        return super().color_modes
+
+
 class ActionDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         self.add_converter(Converter('action', 'sensor'))
 
 
 class SwitchSensorDevice(ActionDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         self.add_converters(
@@ -355,6 +671,8 @@ class SwitchSensorDevice(ActionDevice):
 
 
 class RelayDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         switches = self.switches
@@ -377,7 +695,10 @@ class RelayDevice(XDevice):
         return self.prop_params.get(f'{index}-p')
 
 
+@register_device(DeviceType.SWITCH_PANEL)
 class SwitchPanelDevice(RelayDevice, SwitchSensorDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         SwitchSensorDevice.setup_converters(self)
@@ -395,7 +716,10 @@ class SwitchPanelDevice(RelayDevice, SwitchSensorDevice):
         return self.prop_params.get(f'{index}-sp')
 
 
-class RelayDoubleDevice(XDevice):
+@register_device(DeviceType.RELAY_DOUBLE)
+class RelayDoubleDevice(RelayDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         self.add_converters(
             PropBoolConv('switch1', 'switch', prop='1-p'),
@@ -403,13 +727,19 @@ class RelayDoubleDevice(XDevice):
         )
 
 
+@register_device(DeviceType.SWITCH_SENSOR, DeviceType.KNOB)
 class KnobDevice(SwitchSensorDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         self.add_converter(EventConv('knob.spin'))
 
 
+@register_device(DeviceType.MOTION_SENSOR, DeviceType.MOTION_WITH_LIGHT)
 class MotionDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         params = self.prop_params
@@ -426,15 +756,17 @@ class MotionDevice(XDevice):
         self.add_converter(EventConv('approach.false'))
 
         if 'luminance' in params:
-            self.add_converter(PropConv('luminance', 'sensor', prop='luminance'))
-            self.converters['luminance'].option = {
+            self.add_converter(PropConv('luminance', 'sensor', prop='luminance', option={
                 'name': '当前光照值',
                 'class': 'illuminance',
                 'unit': 'lx',
-            }
+            }))
 
 
+@register_device(DeviceType.MAGNET_SENSOR)
 class ContactDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         self.add_converter(Converter('contact', 'binary_sensor'))
@@ -442,18 +774,23 @@ class ContactDevice(XDevice):
         self.add_converter(EventConv('contact.close'))
 
 
+@register_device(DeviceType.CURTAIN)
 class CoverDevice(XDevice):
+    __slots__ = ()
+
+    def converters_key(self):
+        return None
+
     def setup_converters(self):
         super().setup_converters()
         _LOGGER.debug("Setting up cover device converters for device: %s", self.id)
         
         self.add_converters(
-            MotorConv('motor', 'cover'),
+            MotorConv('motor', 'cover', childs={'run_state'}, option={'name': self.name}),
             CoverPositionConv('position', parent='motor', prop='tp'),
             CoverPositionConv('current_position', parent='motor', prop='cp'),
             PropBoolConv('route_calibrated', None, prop='rs', parent='motor'),
         )
-        self.converters['motor'].option = {'name': self.name}
         if (getattr(self, 'pt', None) == 22) or any(k in self.prop_params for k in ('cra', 'tra', 'trs')):
             self.add_converters(
                 TiltAngleConv('current_angle', parent='motor', prop='cra'),
@@ -466,6 +803,8 @@ class CoverDevice(XDevice):
 
 
 class WifiPanelDevice(RelayDoubleDevice):
+    __slots__ = ()
+
     def __init__(self, node: dict):
         super().__init__({
             **node,
@@ -487,8 +826,13 @@ class WifiPanelDevice(RelayDoubleDevice):
 
 
 
+@register_device(DeviceType.VRF, DeviceType.AIR_CONDITIONER)
 class AirConditionDevice(XDevice):
-    
+    __slots__ = ()
+
+    def converters_key(self):
+        return None
+
     def setup_converters(self):
         super().setup_converters()
         
@@ -515,13 +859,17 @@ class AirConditionDevice(XDevice):
             params = self.prop_params
             if f"{i}-acct" in params:
                 self.add_converter(
-                    AirConditionCurrentTempSensorAcctConv(i)
+                    AirConditionCurrentTempSensorAcctConv(i, option={
+                        'name': f'{self.name} 室内温度',
+                        'class': 'temperature',
+                        'unit': UnitOfTemperature.CELSIUS,
+                    })
                 )
-                self.converters[f'temperature{i}'].option = {
-                    'name': f'{self.name} 室内温度',
-                    'class': 'temperature',
-                    'unit': UnitOfTemperature.CELSIUS,
-                }
+
+        if self.type == DeviceType.VRF:
+            # pushes of VRF units are unreliable
+            for conv in list(self.converters.values()):
+                self.add_converter(conv.replace(poll=True))
     
     def detect_air_condition_channels(self):
         channels = 1
@@ -557,58 +905,58 @@ class AirConditionDevice(XDevice):
                 await asyncio.sleep(1)
                 await gateway.setup_entity('sensor', self, conv)
 
+@register_device(DeviceType.BATH_HEATER)
 class BathHeaterDevice(XDevice):
+    __slots__ = ()
+
+    def converters_key(self):
+        return None
+
     def setup_converters(self):
         super().setup_converters()
-        self.add_converter(PropBoolConv('heater_power', 'switch', prop='p'))
-        self.converters['heater_power'].option = {
+        self.add_converter(PropBoolConv('heater_power', 'switch', prop='p', option={
             'name': f'{self.name} 浴霸电源',
-        }
+        }))
 
         self.add_converter(BathHeaterModeConv())
-        self.add_converter(PropConv('ventilation', 'fan', prop='ve'))
-        self.add_converter(PropConv('blow', 'fan', prop='fa'))
-        self.add_converter(PropConv('warm', 'fan', prop='he'))
-        self.converters['ventilation'].option = {'name': f'{self.name} 换气'}
-        self.converters['blow'].option = {'name': f'{self.name} 吹风'}
-        self.converters['warm'].option = {'name': f'{self.name} 暖风'}
-        self.converters['ventilation'].option = {'name': f'{self.name} 换气'}
-        self.converters['blow'].option = {'name': f'{self.name} 吹风'}
-        self.converters['warm'].option = {'name': f'{self.name} 暖风'}
-        self.add_converter(PropConv('current_temp', 'sensor', prop='t', parent='heater_power'))
-        self.converters['current_temp'].option = {
+        self.add_converter(PropConv('ventilation', 'fan', prop='ve', option={'name': f'{self.name} 换气'}))
+        self.add_converter(PropConv('blow', 'fan', prop='fa', option={'name': f'{self.name} 吹风'}))
+        self.add_converter(PropConv('warm', 'fan', prop='he', option={'name': f'{self.name} 暖风'}))
+        self.add_converter(PropConv('current_temp', 'sensor', prop='t', parent='heater_power', option={
             'name': f'{self.name} 环境温度',
             'class': 'temperature',
             'unit': UnitOfTemperature.CELSIUS,
-        }
-        self.add_converter(PropConv('target_temp', 'number', prop='tgt', parent='heater_power'))
-        self.converters['target_temp'].min = 1.0
-        self.converters['target_temp'].max = 50.0
-        self.converters['target_temp'].step = 1.0
-        self.converters['target_temp'].option = {
-            'name': f'{self.name} 目标环境温度',
-        }
-        
+        }))
+        self.add_converter(NumberConv(
+            'target_temp', 'number', prop='tgt', parent='heater_power',
+            min=1.0, max=50.0, step=1.0,
+            option={'name': f'{self.name} 目标环境温度'},
+        ))
+
+
+@register_device(DeviceType.SIMPLE_SWITCH)
 class SimpleSwitchDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
         self.add_converter(PropBoolConv('switch', 'switch', prop='p'))
 
 
+@register_device(DeviceType.AUDIO_DEVICE)
 class AudioDevice(XDevice):
+    __slots__ = ()
+
     def setup_converters(self):
         super().setup_converters()
-        self.add_converter(PropBoolConv('power', 'switch', prop='p'))
-        self.converters['power'].option = {'name': '电源'}
+        self.add_converter(PropBoolConv('power', 'switch', prop='p', option={'name': '电源'}))
 
-        self.add_converter(PropConv('amv', 'number', prop='amv'))
-        self.converters['amv'].min = 1.0
-        self.converters['amv'].max = 100.0
-        self.converters['amv'].step = 1.0
-        self.converters['amv'].option = {'name': '音量'}
+        self.add_converter(NumberConv(
+            'amv', 'number', prop='amv', min=1.0, max=100.0, step=1.0,
+            option={'name': '音量'},
+        ))
 
-        asi = PropMapConv('asi', 'select', prop='asi')
-        asi.map = {
+        self.add_converter(PropMapConv('asi', 'select', prop='asi', map={
             1: 'ARC',
             2: 'BD',
             3: 'GAME',
@@ -617,28 +965,21 @@ class AudioDevice(XDevice):
             6: 'AUX',
             7: 'USB',
             8: 'BT',
-        }
-        asi.option = {'name': '输入选择'}
-        self.add_converter(asi)
+        }, option={'name': '输入选择'}))
 
-        ams = PropMapConv('ams', 'select', prop='ams')
-        ams.map = {
+        self.add_converter(PropMapConv('ams', 'select', prop='ams', map={
             1: 'True 3D',
             2: 'Virtual 3D',
             3: '2.1',
             4: 'Music Hall',
-        }
-        ams.option = {'name': '模式选择'}
-        self.add_converter(ams)
-
-        self.add_converter(PropConv('amicvol', 'number', prop='amicvol'))
-        self.converters['amicvol'].min = 1.0
-        self.converters['amicvol'].max = 40.0
-        self.converters['amicvol'].step = 1.0
-        self.converters['amicvol'].option = {'name': 'MIC音量'}
-
-        self.add_converter(PropConv('amicech', 'number', prop='amicech'))
-        self.converters['amicech'].min = 1.0
-        self.converters['amicech'].max = 40.0
-        self.converters['amicech'].step = 1.0
-        self.converters['amicech'].option = {'name': '效果音量'}
+        }, option={'name': '模式选择'}))
+
+        self.add_converter(NumberConv(
+            'amicvol', 'number', prop='amicvol', min=1.0, max=40.0, step=1.0,
+            option={'name': 'MIC音量'},
+        ))
+
+        self.add_converter(NumberConv(
+            'amicech', 'number', prop='amicech', min=1.0, max=40.0, step=1.0,
+            option={'name': '效果音量'},
+        ))
@@ -2,13 +2,24 @@ import asyncio
 import logging
 import random
 import json
-from typing import Callable, Dict, Union, Optional
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, Set, Tuple, Union, Optional
 
 from .const import *
-from .device import XDevice, GatewayDevice, WifiPanelDevice
+from .cache import TTLCache
+from .metrics import GatewayMetrics
+from .rtt import RttEstimator
+from .retry import RetryBudget, is_idempotent
+from .trace import FrameTrace, IN, OUT
+from .capture import CaptureRecorder
+from .tracing import Tracer, CURRENT_TRACE
+from .poller import PollScheduler
+from .device import XDevice, NodeType, GatewayDevice, GroupDevice, WifiPanelDevice
 from .converters.base import Converter
 
 _LOGGER = logging.getLogger(__name__)
+_PROTOCOL_LOGGER = logging.getLogger(f'{__name__}.protocol')
 MSG_SPLIT = b'\r\n'
 
 
@@ -26,12 +37,59 @@ class ProGateway:
         self.pid = options.get('pid', 1)
         self.hass = options.get('hass')
         self.timeout = options.get('timeout', 5)
+        timeout_max = options.get('timeout_max', 30)
+        self.rtt = RttEstimator(
+            self.timeout,
+            min_timeout=options.get('timeout_min', 1),
+            max_timeout=timeout_max,
+            initials={
+                'gateway_get.topology': timeout_max,
+                'device_get.topology': timeout_max,
+            },
+        )
+        self.retries = options.get('retries', 2)
+        self.retry_backoff = options.get('retry_backoff', 0.2)
+        # overall wait for a reply across all attempts of a command, never shorter than the first attempt
+        self.max_wait = options.get('max_wait', self.timeout)
+        self.retry_budget = RetryBudget(options.get('retry_ratio', 0.2))
         self.keepalive = options.get('keepalive', 60)
         self.entry_id = options.get('entry_id')
         self.devices: Dict[str, "XDevice"] = {}
         self.setups: Dict[str, Callable] = {}
+        self.member_groups: Dict[int, Set[int]] = {}
+        self.rooms: Dict[int, dict] = {}
+        self.stale_timeout = options.get('stale_timeout', 0)
+        self.watch_task: Optional[asyncio.Task] = None
+        self.poller = PollScheduler(
+            self,
+            interval=options.get('poll_interval', 60),
+            max_interval=options.get('poll_max_interval', 600),
+        )
         self.log = options.get('logger', _LOGGER)
-        self._msgs: Dict[Union[int, str], asyncio.Future] = {}
+        self.protocol_log = options.get('protocol_logger', _PROTOCOL_LOGGER)
+        self.log_sample = max(1, int(options.get('log_sample', 1)))
+        # pending requests by id, with the method they were sent with
+        self._msgs: Dict[Union[int, str], Tuple[asyncio.Future, Optional[str]]] = {}
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self.queues: Dict[Union[int, str], Deque[tuple]] = {}
+        self._workers: Dict[Union[int, str], asyncio.Task] = {}
+        self.handlers: Dict[str, Callable] = {}
+        for prefix in ['gateway', 'device']:
+            self.add_handler(f'{prefix}_post.topology', self.on_topology)
+            self.add_handler(f'{prefix}_post.prop', self.on_prop)
+            self.add_handler(f'{prefix}_post.event', self.on_event)
+            self.add_handler(f'{prefix}_get.node', self.on_nodes)
+        self.counters = Counter()
+        self.metrics = GatewayMetrics()
+        self.trace = FrameTrace(options.get('trace_size', 200))
+        self.recorder: Optional[CaptureRecorder] = None
+        self._capture_flush: Optional[asyncio.Future] = None
+        self.offline = options.get('offline', False)
+        self.tracer = Tracer(options.get('trace_spans', 2000), enabled=options.get('tracing', False))
+        self.metrics_interval = options.get('metrics_interval', 60)
+        self.metrics_task: Optional[asyncio.Task] = None
+        self.unsupported: Dict[int, int] = {}
+        self.cache = TTLCache(options.get('cache_size', 256), options.get('cache_ttl', 30))
 
         self.log.debug('Gateway: %s, pid: %s', host, self.pid)
 
@@ -41,12 +99,12 @@ class ProGateway:
         self.setups[domain] = handler
         self.log.debug('Setup %s added for %s', domain, self.host)
 
-    async def setup_entity(self, domain: str, device: "XDevice", conv: "Converter"):
+    async def setup_entity(self, domain: str, device: "XDevice", *convs: "Converter"):
         handler = self.setups.get(domain)
         if handler:
-            handler(device, conv)
+            handler(device, *convs)
         else:
-            self.log.warning('Setup %s not ready for %s', domain, [device, conv])
+            self.log.warning('Setup %s not ready for %s', domain, [device, *convs])
 
     async def add_device(self, device: "XDevice"):
         if not device.hass:
@@ -55,6 +113,8 @@ class ProGateway:
             self.devices[device.id] = device
         if self not in device.gateways:
             device.gateways.append(self)
+        if isinstance(device, GroupDevice):
+            self.index_group(device)
 
         self.log.info('Setup device: %s', [device.unique_id, device.name, device])
 
@@ -62,23 +122,93 @@ class ProGateway:
             return
         await device.setup_entities()
 
+    def index_group(self, group: "GroupDevice"):
+        if group.nt == NodeType.ROOM and (room := self.rooms.get(group.id)):
+            group.members |= room['nodes']
+        for gids in self.member_groups.values():
+            gids.discard(group.id)
+        for mid in group.members:
+            self.member_groups.setdefault(mid, set()).add(group.id)
+        group.member_changed()
+
+    def index_room(self, node: dict):
+        if not (rid := node.get('id')):
+            return None
+        rid = int(rid)
+        room = self.rooms.setdefault(rid, {'id': rid, 'n': '', 'nodes': set()})
+        room['n'] = node.get('n') or room['n']
+        if 'nodes' in node:
+            room['nodes'] = GroupDevice.node_ids(node['nodes'])
+        if isinstance(group := self.devices.get(rid), GroupDevice):
+            group.members = set(room['nodes'])
+            self.index_group(group)
+        return room
+
+    async def load_rooms(self):
+        """Build the room index from a single room query."""
+        res = await self.get_room(0)
+        for node in (res or {}).get('rooms') or []:
+            self.index_room(node)
+        return self.rooms
+
+    async def load_scenes(self):
+        """Register all scenes from a single scene query."""
+        if not isinstance(self.device, GatewayDevice):
+            return None
+        if (scenes := await self.get_scene(0)) is None:
+            # only a real scene list is complete enough to remove scenes
+            return None
+        return await self.device.load_scenes(scenes, complete=True)
+
+    def room_of(self, nid):
+        for room in self.rooms.values():
+            if nid in room['nodes']:
+                return room
+        return None
+
+    def members_changed(self, nids):
+        gids = set()
+        for nid in nids:
+            gids.update(self.member_groups.get(nid, ()))
+        for gid in gids:
+            if group := self.devices.get(gid):
+                group.member_changed()
+
     async def start(self):
-        self._msgs['ready'] = asyncio.get_event_loop().create_future()
+        self._msgs['ready'] = (asyncio.get_event_loop().create_future(), None)
         self.main_task = asyncio.create_task(self.run_forever())
         await self.ready()
+        self.poller.start()
+        if self.stale_timeout:
+            self.watch_task = asyncio.create_task(self.watch_availability())
+        if self.metrics_interval:
+            self.metrics_task = asyncio.create_task(self.publish_metrics())
 
     async def ready(self):
         if not self.writer:
-            if not (fut := self._msgs.get('ready')):
+            if not (pending := self._msgs.get('ready')):
                 return None
+            fut = pending[0]
             try:
                 await asyncio.wait_for(fut, self.timeout)
             except asyncio.TimeoutError:
                 return None
 
         await self.topology(wait_result=True)
+        await self.load_rooms()
+        await self.load_scenes()
 
     async def stop(self, *args):
+        self.poller.stop()
+        if self.watch_task:
+            self.watch_task.cancel()
+            self.watch_task = None
+        if self.metrics_task:
+            self.metrics_task.cancel()
+            self.metrics_task = None
+        await self.stop_capture()
+        for task in self._workers.values():
+            task.cancel()
         if self.main_task and not self.main_task.cancelled():
             self.main_task.cancel()
 
@@ -89,6 +219,7 @@ class ProGateway:
             except Exception:
                 pass
             self.writer = None
+        self.refresh_availability()
 
         for device in self.devices.values():
             if self in device.gateways:
@@ -122,11 +253,37 @@ class ProGateway:
             self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
             if not self.writer:
                 return False
-            if fut := self._msgs.get('ready'):
-                fut.set_result(True)
+            self.metrics.connected()
+            if pending := self._msgs.get('ready'):
+                pending[0].set_result(True)
                 del self._msgs['ready']
+            self.refresh_availability()
         return True
 
+    @property
+    def connected(self):
+        return self.writer is not None
+
+    def refresh_availability(self, nids=None):
+        """Write the state of all entities whose device availability changed, in one pass."""
+        changed = []
+        devices = self.devices.values() if nids is None else filter(None, map(self.devices.get, nids))
+        for dvc in devices:
+            if (available := dvc.available) == dvc.available_state:
+                continue
+            dvc.available_state = available
+            changed.append(dvc)
+        for dvc in changed:
+            for ent in dvc.entities.values():
+                if ent.added:
+                    ent.async_write_ha_state()
+        return changed
+
+    async def watch_availability(self):
+        while True:
+            await asyncio.sleep(max(1, self.stale_timeout / 4))
+            self.refresh_availability()
+
     async def check_available(self):
         try:
             await asyncio.wait_for(self._connect(), self.timeout)
@@ -137,6 +294,9 @@ class ProGateway:
 
     async def readline(self):
         msg = b''
+        tracing = self.tracer.enabled
+        read_start = time.perf_counter() if tracing else 0
+        first_chunk = 0
         while True:
             try:
                 buf = await self.reader.readline()
@@ -149,65 +309,250 @@ class ProGateway:
                     except (BrokenPipeError, Exception) as ce:
                         self.log.error('Connection close error: %s', [type(ce), ce])
                     self.writer = None
+                    self.refresh_availability()
                 self.log.error('Readline error: %s', [type(exc), exc])
                 await asyncio.sleep(self.timeout - 0.1)
             if not buf:
                 break
+            if tracing and not msg:
+                first_chunk = time.perf_counter()
             msg += buf
             if buf[-2:] == MSG_SPLIT:
-                await self.on_message(msg)
+                received = (read_start, first_chunk, time.perf_counter()) if tracing else None
+                await self.on_message(msg, received)
                 break
         return msg
 
-    async def on_message(self, msg):
+    async def on_message(self, msg, received: tuple = None):
+        """Handle a frame, `received` are the read start, first chunk and framed times when tracing."""
+        if not (trace := self.tracer.start()):
+            return await self.handle_message(msg)
+        if received:
+            read_start, first_chunk, framed = received
+            trace.add('socket_read', read_start, first_chunk)
+            trace.add('framing', first_chunk, framed)
+        token = CURRENT_TRACE.set(trace)
+        try:
+            await self.handle_message(msg, trace)
+        finally:
+            CURRENT_TRACE.reset(token)
+
+    async def handle_message(self, msg, trace=None):
+        self.trace.record(IN, msg)
+        if self.recorder:
+            self.record_capture(IN, msg)
+        start = time.perf_counter()
         dat = json.loads(msg.decode()) or {}
+        decoded = time.perf_counter()
+        self.metrics.decode.observe(decoded - start)
+        if trace:
+            trace.add('json_decode', start, decoded, size=len(msg))
         cmd = dat.get('method')
         cid = cmd if cmd == 'gateway_post.topology' else dat.get('id')
-        nodes = dat.get('nodes') or []
-        if ack := self._msgs.get(cid):
-            ack.set_result(dat)
-        else:
-            self.log.info('Gateway message: %s', [cid, dat])
-
-        if is_topology := cmd in ['gateway_post.topology', 'device_post.topology']:
-            if not self.device:
-                self.device = GatewayDevice(self)
-                await self.add_device(self.device)
-
-        if not nodes and 'params' in dat:
-            nodes = [dat['params']]
-
-        async def process_node(node):
-            if not (nid := node.get('id')):
+        self.metrics.frame_in(cmd or 'reply', len(msg))
+        self.log_frame('in', dat)
+        if pending := self._msgs.get(cid):
+            ack, sent = pending
+            if not ack.done():
+                ack.set_result(dat)
+            if not cmd:
+                # replies carry no method, dispatch them by the method of the request
+                cmd = sent
+        if not (handler := self.handlers.get(cmd)):
+            if pending:
                 return
-            if is_topology:
-                await XDevice.from_node(self, node)
-                if node.get('nt') == 6:
-                    return
-            if cmd in ['device_post.topology'] and not self.device:
-                self.device = WifiPanelDevice(node)
-                await self.add_device(self.device)
-            if node.get('nt') == 6 and self.device:
-                dvc = self.device
-            elif not (dvc := self.devices.get(nid)):
-                await XDevice.from_node(self, node)
-                dvc = self.devices.get(nid)
-                if not dvc:
-                    if node.get('nt') == 6:
-                        return
-                    self.log.warning('Device not found: %s', node)
-                    return
-            if cmd in ['gateway_post.prop', 'device_post.prop']:
-                await dvc.prop_changed(node)
-            if cmd in ['gateway_post.event', 'device_post.event']:
-                await dvc.event_fired(node)
-
-        if nodes:
-            await asyncio.gather(*(process_node(node) for node in nodes))
+            if cid is not None and '_post.' not in (cmd or ''):
+                # a reply nobody waits for anymore, e.g. after a timeout
+                self.metrics.orphans += 1
+            else:
+                self.counters['unhandled'] += 1
+            return
+        nodes = self.frame_nodes(dat)
+        if not trace:
+            return await handler(cmd, nodes)
+        start = time.perf_counter()
+        await handler(cmd, nodes)
+        trace.add('dispatch', start, method=cmd)
+
+    @staticmethod
+    def frame_nodes(dat):
+        """Nodes of a frame or reply, a single node may come as `params`."""
+        if not isinstance(dat, dict):
+            return []
+        if nodes := dat.get('nodes'):
+            return nodes
+        if 'params' in dat:
+            return [dat['params']]
+        return []
+
+    def log_frame(self, direction: str, dat: dict):
+        """Log one in every `log_sample` frames counted by `metrics` to the protocol logger."""
+        if not self.protocol_log.isEnabledFor(logging.DEBUG):
+            return
+        frames = self.metrics.frames_in if direction == 'in' else self.metrics.frames_out
+        count = sum(frames.values())
+        if count % self.log_sample:
+            return
+        self.protocol_log.debug('%s %s #%s: %s', self.host, direction, count, dat)
+
+    def add_handler(self, method: str, handler: Callable):
+        """Register an async `handler(method, nodes)` for messages with this method."""
+        self.handlers[method] = handler
+
+    async def on_topology(self, cmd, nodes: list):
+        self.cache.clear()
+        if not self.device:
+            self.device = GatewayDevice(self)
+            await self.add_device(self.device)
+        scenes = []
+        for node in nodes:
+            if not (nid := node.get('id')):
+                continue
+            if node.get('nt') == NodeType.SCENE:
+                scenes.append(node)
+                continue
+            if node.get('nt') == NodeType.ROOM:
+                self.index_room(node)
+            self.schedule(nid, self.node_topology, cmd, node)
+        if scenes and isinstance(self.device, GatewayDevice):
+            self.schedule(self.device.id, self.device.load_scenes, scenes)
+
+    async def on_prop(self, cmd, nodes: list):
+        changed = set()
+        for node in nodes:
+            if not (nid := node.get('id')):
+                continue
+            self.cache.pop(('node', nid))
+            if nid in self.queues or not (dvc := self.node_device(node)) or not dvc.prop_updated(node):
+                self.schedule(nid, self.node_prop, node)
+                continue
+            changed.add(nid)
+        if changed:
+            self.nodes_changed(changed)
+
+    async def on_event(self, cmd, nodes: list):
+        for node in nodes:
+            if not (nid := node.get('id')):
+                continue
+            if nid in self.queues or not (dvc := self.node_device(node)):
+                self.schedule(nid, self.node_event, node)
+                continue
+            dvc.fire_event(node)
+
+    async def on_nodes(self, cmd, nodes: list):
+        """Node query replies, pick up nodes that were not in the topology and apply polled props."""
+        changed = set()
+        for node in nodes:
+            if not (nid := node.get('id')):
+                continue
+            if node.get('nt') == NodeType.SCENE:
+                if not self.node_device(node):
+                    self.schedule(nid, self.ensure_device, node)
+                continue
+            if nid in self.queues or not (dvc := self.node_device(node)) or not dvc.prop_updated(node, pushed=False):
+                self.schedule(nid, self.node_prop, node, False)
+                continue
+            changed.add(nid)
+        if changed:
+            self.nodes_changed(changed)
+
+    def schedule(self, key, func, *args):
+        """Queue work for a node behind anything already queued for it, keeping per-node FIFO order.
+
+        Frames for nodes with nothing queued are applied inline by `on_message`.
+        """
+        if (queue := self.queues.get(key)) is None:
+            queue = self.queues[key] = deque()
+            self._workers[key] = asyncio.create_task(self._drain(key, queue))
+        queue.append((func, args, CURRENT_TRACE.get()))
+        self.metrics.queued(len(queue))
+
+    async def _drain(self, key, queue: Deque[tuple]):
+        try:
+            while queue:
+                func, args, trace = queue[0]
+                token = CURRENT_TRACE.set(trace)
+                try:
+                    await func(*args)
+                except Exception:
+                    self.log.exception('Dispatch %s for %s failed', func.__name__, key)
+                finally:
+                    CURRENT_TRACE.reset(token)
+                queue.popleft()
+        finally:
+            self.queues.pop(key, None)
+            self._workers.pop(key, None)
+
+    async def settle(self):
+        """Wait until all queued node work has been processed."""
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+
+    async def node_topology(self, cmd, node):
+        await XDevice.from_node(self, node)
+        if cmd == 'device_post.topology' and not self.device:
+            self.device = WifiPanelDevice(node)
+            await self.add_device(self.device)
+
+    def node_device(self, node: dict):
+        if node.get('nt') == NodeType.SCENE and self.device:
+            return self.device
+        return self.devices.get(node['id'])
+
+    async def ensure_device(self, node: dict):
+        if dvc := self.node_device(node):
+            return dvc
+        await XDevice.from_node(self, node)
+        if not (dvc := self.node_device(node)) and node.get('nt') != NodeType.SCENE:
+            self.log.warning('Device not found: %s', node)
+        return dvc
+
+    async def node_prop(self, node: dict, pushed=True):
+        if dvc := await self.ensure_device(node):
+            await dvc.prop_changed(node, pushed)
+            self.nodes_changed({node['id']})
+
+    async def node_event(self, node: dict):
+        if dvc := await self.ensure_device(node):
+            dvc.fire_event(node)
+
+    def nodes_changed(self, changed: Set[int]):
+        if self.member_groups:
+            self.members_changed(changed)
+        self.refresh_availability(changed)
 
     async def send(self, method, wait_result=True, **kwargs):
+        """Send a command, identical commands already in flight share one request."""
+        if not wait_result:
+            return await self._send(method, wait_result=False, **kwargs)
+        self.counters['send'] += 1
+        key = (method, json.dumps(kwargs, sort_keys=True))
+        if task := self._inflight.get(key):
+            self.counters['dedup_hit'] += 1
+            return await asyncio.shield(task)
+        task = asyncio.create_task(self._send(method, **kwargs))
+        self._inflight[key] = task
+
+        def done(_):
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    @property
+    def dedup_rate(self):
+        if not (total := self.counters['send']):
+            return 0.0
+        return self.counters['dedup_hit'] / total
+
+    async def _send(self, method, wait_result=True, **kwargs):
+        if self.offline:
+            return None
         if not self.writer:
             await self.connect()
+        if not self.writer:
+            return None
         if method == 'gateway_get.topology':
             cid = 'gateway_post.topology'
         else:
@@ -215,41 +560,148 @@ class ProGateway:
         fut = None
         if wait_result:
             fut = asyncio.get_event_loop().create_future()
-            self._msgs[cid] = fut
+            self._msgs[cid] = (fut, method)
 
         dat = {
             'id': cid,
             'method': method,
             **kwargs,
         }
-        self.log.info('Send command: %s', dat)
-        self.writer.write(json.dumps(dat).encode() + MSG_SPLIT)
-        await self.writer.drain()
+        raw = json.dumps(dat).encode() + MSG_SPLIT
+        start = time.perf_counter()
+        await self.write_frame(method, dat, raw)
 
         if not fut:
             return None
+        self.retry_budget.deposit()
+        retries = self.retries if is_idempotent(method, kwargs) else 0
+        deadline = start + max(self.max_wait, self.rtt.timeout(method))
         try:
-            await asyncio.wait_for(fut, self.timeout)
-        except asyncio.TimeoutError:
-            return None
+            for attempt in range(retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1))
+                    if fut.done() or not self.writer or time.perf_counter() >= deadline:
+                        break
+                    if not self.retry_budget.withdraw():
+                        break
+                    # same id, a late reply to any attempt resolves the command
+                    self.metrics.retry(method)
+                    await self.write_frame(method, dat, raw)
+                try:
+                    wait = min(self.rtt.timeout(method, attempt), deadline - time.perf_counter())
+                    await asyncio.wait_for(asyncio.shield(fut), max(wait, 0))
+                    break
+                except asyncio.TimeoutError:
+                    self.metrics.timeout(method)
+            if not fut.done():
+                return None
         finally:
             del self._msgs[cid]
+            if not fut.done():
+                fut.cancel()
+        rtt = time.perf_counter() - start
+        self.metrics.reply(method, rtt)
+        if not attempt:
+            # replies to resent commands are ambiguous, only sample first attempts (Karn)
+            self.rtt.sample(method, rtt)
         res = fut.result()
         return res
 
+    async def write_frame(self, method: str, dat: dict, raw: bytes):
+        """Write an encoded frame, first sends and retries are all logged, counted and captured."""
+        self.metrics.frame_out(method, len(raw))
+        self.log_frame('out', dat)
+        self.trace.record(OUT, raw)
+        if self.recorder:
+            self.record_capture(OUT, raw)
+        self.writer.write(raw)
+        await self.writer.drain()
+
+    async def start_capture(self, path: str):
+        """Record every frame of this gateway to a JSONL file until `stop_capture`."""
+        await self.stop_capture()
+        loop = asyncio.get_running_loop()
+        self.recorder = await loop.run_in_executor(None, CaptureRecorder, path)
+        return self.recorder
+
+    async def stop_capture(self):
+        if not (recorder := self.recorder):
+            return None
+        self.recorder = None
+        if self._capture_flush:
+            await self._capture_flush
+        await asyncio.get_running_loop().run_in_executor(None, recorder.write, recorder.take())
+        return recorder
+
+    def record_capture(self, direction: str, raw: bytes):
+        self.recorder.record(direction, raw)
+        if not self.recorder.should_flush or (self._capture_flush and not self._capture_flush.done()):
+            return
+        recorder = self.recorder
+        self._capture_flush = asyncio.get_running_loop().run_in_executor(None, recorder.write, recorder.take())
+
+    def metrics_snapshot(self):
+        """Protocol metrics of this gateway, with the current queue depths."""
+        return self.metrics.snapshot(
+            pending=len(self._msgs),
+            inflight=len(self._inflight),
+            queued=sum(map(len, self.queues.values())),
+            cache=self.cache.stats(),
+            rto=self.rtt.snapshot(),
+            counters=dict(self.counters),
+        )
+
+    async def publish_metrics(self):
+        """Push a metrics summary to the diagnostic sensors of the gateway device."""
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            if self.device:
+                self.device.update(self.metrics_summary())
+
+    def metrics_summary(self):
+        metrics = self.metrics
+        return {
+            'frames_in': sum(metrics.frames_in.values()),
+            'frames_out': sum(metrics.frames_out.values()),
+            'rtt': round(metrics.rtt_avg() * 1000, 1),
+            'timeouts': sum(metrics.timeouts.values()),
+            'reconnects': metrics.reconnects,
+            'pending': len(self._msgs) + sum(map(len, self.queues.values())),
+        }
+
     async def topology(self, wait_result=False):
         cmd = 'device_get.topology' if self.pid == PID_WIFI_PANEL else 'gateway_get.topology'
         await self.send(cmd, wait_result=wait_result)
 
+    async def query(self, key: tuple, method, wait_result=True, **kwargs):
+        """Read-through the per-gateway cache for gateway queries."""
+        if not wait_result:
+            return await self.send(method, wait_result=False, **kwargs)
+        if (res := self.cache.get(key)) is not None:
+            return res
+        res = await self.send(method, **kwargs)
+        if res is not None:
+            self.cache.set(key, res)
+        return res
+
     async def get_node(self, nid=0, wait_result=True):
         cmd = 'device_get.node' if self.pid == PID_WIFI_PANEL else 'gateway_get.node'
-        return await self.send(cmd, params={'id': nid}, wait_result=wait_result)
+        return await self.query(('node', nid), cmd, params={'id': nid}, wait_result=wait_result)
+
+    async def read_node(self, nid):
+        """Query a node like `get_node`, bypassing the cache."""
+        cmd = 'device_get.node' if self.pid == PID_WIFI_PANEL else 'gateway_get.node'
+        res = await self.send(cmd, params={'id': nid})
+        if res is not None:
+            self.cache.set(('node', nid), res)
+        return res
 
     async def get_room(self, rid=0, wait_result=True):
-        return await self.send('gateway_get.room', params={'id': rid}, wait_result=wait_result)
+        return await self.query(('room', rid), 'gateway_get.room', params={'id': rid}, wait_result=wait_result)
 
     async def get_scene(self, rid=0, wait_result=True):
-        res = await self.send('gateway_get.scene', params={'id': rid}, wait_result=wait_result)
-        if res:
-            res = res.get('scenes', [])
-        return res
+        """Scene list of a room, None when the reply has no scene list, e.g. an error reply."""
+        res = await self.query(('scene', rid), 'gateway_get.scene', params={'id': rid}, wait_result=wait_result)
+        if isinstance(res, dict) and isinstance(scenes := res.get('scenes'), list):
+            return scenes
+        return None
@@ -0,0 +1,126 @@
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Sequence
+
+RTT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+DECODE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+
+class Histogram:
+    """Fixed bucket histogram, `observe` is a bisect and a few additions."""
+    __slots__ = ('buckets', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, buckets: Sequence[float] = RTT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def avg(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float):
+        """Upper bound of the bucket holding the `q` quantile, `max` for the overflow bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'avg': self.avg,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': dict(zip([*map(str, self.buckets), '+inf'], self.counts)),
+        }
+
+
+class GatewayMetrics:
+    """Always-on counters of one gateway link.
+
+    Every hook is a couple of dict or list updates so recording can stay
+    enabled in production, `snapshot` does the aggregation.
+    """
+
+    def __init__(self):
+        self.frames_in = Counter()
+        self.bytes_in = Counter()
+        self.frames_out = Counter()
+        self.bytes_out = Counter()
+        self.timeouts = Counter()
+        self.retries = Counter()
+        self.rtt: Dict[str, Histogram] = {}
+        self.decode = Histogram(DECODE_BUCKETS)
+        self.orphans = 0
+        self.connects = 0
+        self.queue_max = 0
+        self.started = time.monotonic()
+
+    def frame_in(self, method: str, size: int):
+        self.frames_in[method] += 1
+        self.bytes_in[method] += size
+
+    def frame_out(self, method: str, size: int):
+        self.frames_out[method] += 1
+        self.bytes_out[method] += size
+
+    def reply(self, method: str, rtt: float):
+        if (hist := self.rtt.get(method)) is None:
+            hist = self.rtt[method] = Histogram()
+        hist.observe(rtt)
+
+    def timeout(self, method: str):
+        self.timeouts[method] += 1
+
+    def retry(self, method: str):
+        self.retries[method] += 1
+
+    def connected(self):
+        self.connects += 1
+
+    def queued(self, depth: int):
+        if depth > self.queue_max:
+            self.queue_max = depth
+
+    @property
+    def reconnects(self):
+        return max(0, self.connects - 1)
+
+    def rtt_avg(self):
+        count = sum(h.count for h in self.rtt.values())
+        return sum(h.total for h in self.rtt.values()) / count if count else 0.0
+
+    def snapshot(self, **gauges):
+        return {
+            'uptime': time.monotonic() - self.started,
+            'frames_in': dict(self.frames_in),
+            'bytes_in': dict(self.bytes_in),
+            'frames_out': dict(self.frames_out),
+            'bytes_out': dict(self.bytes_out),
+            'rtt': {k: v.snapshot() for k, v in self.rtt.items()},
+            'timeouts': dict(self.timeouts),
+            'retries': dict(self.retries),
+            'orphans': self.orphans,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'queue_max': self.queue_max,
+            'decode': self.decode.snapshot(),
+            **gauges,
+        }
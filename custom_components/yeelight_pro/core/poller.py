@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .device import XDevice
+    from .gateway import ProGateway
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Read the nodes of devices with `poll` converters.
+
+    Each due node is read with the same per-node query as `get_node`, up to
+    `batch` reads run at once. Devices are spread over the interval, devices
+    whose polled attrs were all pushed within the interval are not read, and
+    devices that keep pushing on their own are backed off.
+    """
+
+    def __init__(self, gateway: "ProGateway", interval: float = 60, max_interval: float = 600,
+                 tick: float = 5, batch: int = 20):
+        self.gateway = gateway
+        self.interval = interval
+        self.max_interval = max_interval
+        self.tick = tick
+        self.batch = batch
+        self.due: Dict[int, float] = {}
+        self.backoff: Dict[int, float] = {}
+        self.task = None
+
+    def start(self):
+        if self.interval and not self.task:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.poll_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.gateway.log.error('Poll error: %s', [type(exc), exc], exc_info=exc)
+
+    def due_attrs(self, device: "XDevice", now: float):
+        return {
+            conv.attr
+            for conv in device.converters.values()
+            if conv.poll and now - device.pushed_at.get(conv.prop or conv.attr, 0) >= self.interval
+        }
+
+    def due_nodes(self, now: float):
+        nids = []
+        for dvc in list(self.gateway.devices.values()):
+            if dvc.gateway is not self.gateway:
+                continue
+            if not any(conv.poll for conv in dvc.converters.values()):
+                continue
+            if (due := self.due.get(dvc.id)) is None:
+                self.due[dvc.id] = now + random.uniform(0, self.interval)
+                continue
+            if due > now:
+                continue
+            interval = self.backoff.get(dvc.id, self.interval)
+            if self.due_attrs(dvc, now):
+                interval = self.interval
+                nids.append(dvc.id)
+            else:
+                # everything polled was pushed recently
+                interval = min(interval * 2, self.max_interval)
+            self.backoff[dvc.id] = interval
+            self.due[dvc.id] = now + interval * random.uniform(0.9, 1.1)
+        return nids
+
+    async def poll_due(self):
+        nids = self.due_nodes(time.monotonic())
+        for i in range(0, len(nids), self.batch):
+            # replies are applied by the gateway's node query handler
+            await asyncio.gather(*(self.gateway.read_node(nid) for nid in nids[i:i + self.batch]))
+        return nids
@@ -0,0 +1,41 @@
+def is_idempotent(method: str, params: dict):
+    """Whether resending the command can't change the outcome.
+
+    Reads are, and so are `set.prop` writes of absolute values. Anything
+    carrying an `action` (like `motorAdjust` to stop a curtain) is not.
+    """
+    if '_get.' in method:
+        return True
+    if not method.endswith('_set.prop'):
+        return False
+    return not has_action(params)
+
+
+def has_action(value):
+    if isinstance(value, dict):
+        return 'action' in value or any(has_action(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(has_action(v) for v in value)
+    return False
+
+
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of the commands sent.
+
+    Every command adds `ratio` tokens up to `max_tokens`, every retry takes
+    one, so a dead link can't multiply the traffic.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
@@ -0,0 +1,51 @@
+from typing import Dict
+
+
+class RttEstimator:
+    """Per-method smoothed RTT and RTT variance, deriving command timeouts (RFC 6298).
+
+    Methods without samples use `initials` or `initial`, the estimate is
+    raised to `min_timeout` (1s, as the RFC recommends), each retry of a
+    command doubles its timeout and all timeouts are capped at `max_timeout`.
+    The backoff belongs to one command, the next command starts from the
+    estimate again so a dead command doesn't slow down later ones.
+    """
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial: float = 5, min_timeout: float = 1, max_timeout: float = 30,
+                 initials: Dict[str, float] = None):
+        self.initial = initial
+        self.min_timeout = min_timeout
+        self.max_timeout = max(min_timeout, max_timeout)
+        self.initials = initials or {}
+        self.srtt: Dict[str, float] = {}
+        self.rttvar: Dict[str, float] = {}
+
+    def sample(self, method: str, rtt: float):
+        if (srtt := self.srtt.get(method)) is None:
+            self.srtt[method] = rtt
+            self.rttvar[method] = rtt / 2
+        else:
+            self.rttvar[method] = (1 - self.BETA) * self.rttvar[method] + self.BETA * abs(srtt - rtt)
+            self.srtt[method] = (1 - self.ALPHA) * srtt + self.ALPHA * rtt
+
+    def timeout(self, method: str, attempt: int = 0):
+        """Timeout of the `attempt`th try of a command, 0 for the first send."""
+        if (srtt := self.srtt.get(method)) is None:
+            rto = self.initials.get(method, self.initial)
+        else:
+            rto = srtt + self.K * self.rttvar[method]
+        rto = max(rto, self.min_timeout) * 2 ** min(attempt, 6)
+        return min(rto, self.max_timeout)
+
+    def snapshot(self):
+        return {
+            method: {
+                'srtt': srtt,
+                'rttvar': self.rttvar[method],
+                'timeout': self.timeout(method),
+            }
+            for method, srtt in self.srtt.items()
+        }
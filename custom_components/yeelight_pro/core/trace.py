@@ -0,0 +1,41 @@
+import time
+from typing import List, Optional, Tuple
+
+IN = 'in'
+OUT = 'out'
+
+
+class FrameTrace:
+    """Fixed size ring buffer of the most recent raw protocol frames.
+
+    Slots are preallocated, recording a frame overwrites the oldest one and
+    never allocates beyond the entry tuple.
+    """
+    __slots__ = ('size', 'frames', 'pos', 'count')
+
+    def __init__(self, size: int = 200):
+        self.size = max(0, int(size))
+        self.frames: List[Optional[Tuple[float, str, bytes]]] = [None] * self.size
+        self.pos = 0
+        self.count = 0
+
+    def record(self, direction: str, raw: bytes):
+        if not self.size:
+            return
+        self.frames[self.pos] = (time.time(), direction, raw)
+        self.pos = (self.pos + 1) % self.size
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def entries(self):
+        """Recorded frames, oldest first."""
+        if self.count < self.size:
+            return self.frames[:self.count]
+        return self.frames[self.pos:] + self.frames[:self.pos]
+
+    def clear(self):
+        self.frames = [None] * self.size
+        self.pos = 0
+        self.count = 0
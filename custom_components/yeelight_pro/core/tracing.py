@@ -0,0 +1,53 @@
+import time
+import itertools
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Optional
+
+
+class Trace:
+    """Spans of one incoming frame, from socket read to entity state write."""
+    __slots__ = ('tracer', 'id')
+
+    def __init__(self, tracer: "Tracer", tid: int):
+        self.tracer = tracer
+        self.id = tid
+
+    def add(self, stage: str, start: float, end: float = None, **attrs):
+        """Record a stage that started at `start` (perf_counter) and ended at `end` or now."""
+        self.tracer.spans.append((self.id, stage, start, (end or time.perf_counter()) - start, attrs or None))
+
+
+CURRENT_TRACE: ContextVar[Optional[Trace]] = ContextVar('yeelight_pro_trace', default=None)
+
+
+class Tracer:
+    """Optional tracing of the receive-to-state pipeline into a bounded span buffer.
+
+    When disabled `start` returns None and callers skip all timing work.
+    """
+
+    def __init__(self, size: int = 2000, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: Deque[tuple] = deque(maxlen=size)
+        self.ids = itertools.count(1)
+
+    def start(self) -> Optional[Trace]:
+        if not self.enabled:
+            return None
+        return Trace(self, next(self.ids))
+
+    def clear(self):
+        self.spans.clear()
+
+    def export(self):
+        return [
+            {
+                'trace': tid,
+                'stage': stage,
+                'start': start,
+                'duration_ms': round(duration * 1000, 3),
+                **(attrs or {}),
+            }
+            for tid, stage, start, duration, attrs in self.spans
+        ]
@@ -72,6 +72,10 @@ class XCoverEntity(XEntity, CoverEntity, RestoreEntity):
         if 'tilt_route_calibrated' in data:
             self._attr_extra_state_attributes['tilt_route_calibrated'] = bool(data['tilt_route_calibrated'])
         
+        if 'run_state' in data:
+            self._attr_is_opening = data['run_state'] == 'opening'
+            self._attr_is_closing = data['run_state'] == 'closing'
+
         if 'current_position' in data:
             position = data['current_position']
             self._attr_current_cover_position = position
@@ -108,7 +112,6 @@ class XCoverEntity(XEntity, CoverEntity, RestoreEntity):
             'tilt': self._attr_current_cover_tilt_position,
             'is_closed': self._attr_is_closed
         })
-        self.async_write_ha_state()
 
     @callback
     def async_restore_last_state(self, state: str, attrs: dict):
@@ -117,29 +120,37 @@ class XCoverEntity(XEntity, CoverEntity, RestoreEntity):
         if 'current_position' in attrs:
             self.async_set_state({'current_position': attrs['current_position']})
 
+    def motion_state(self, position: int):
+        """Optimistic state of a move to `position`, shown as opening or closing."""
+        state = {'position': position}
+        current = self._attr_current_cover_position or 0
+        if position != current:
+            state['run_state'] = 'opening' if position > current else 'closing'
+        return state
+
     async def async_open_cover(self, **kwargs):
         """打开窗帘"""
-        await self.device_send_props({'position': 100})
+        await self.device_send_props({'position': 100}, optimistic=self.motion_state(100))
 
     async def async_close_cover(self, **kwargs):
         """关闭窗帘"""
-        await self.device_send_props({'position': 0})
+        await self.device_send_props({'position': 0}, optimistic=self.motion_state(0))
 
     async def async_stop_cover(self, **kwargs):
         """停止窗帘"""
         await self.device_send_props({'motor': 'stop'})
 
     async def async_open_cover_tilt(self, **kwargs):
-        await self.device_send_props({'target_angle': 180})
+        await self.device_send_props({'target_angle': 180}, optimistic={'target_angle': 180})
 
     async def async_close_cover_tilt(self, **kwargs):
-        await self.device_send_props({'target_angle': 0})
+        await self.device_send_props({'target_angle': 0}, optimistic={'target_angle': 0})
 
     async def async_set_cover_tilt_position(self, **kwargs):
         tilt = kwargs.get(ATTR_TILT_POSITION)
         if tilt is not None:
             angle = max(0, min(180, int(round(tilt * 180 / 100))))
-            await self.device_send_props({'target_angle': angle})
+            await self.device_send_props({'target_angle': angle}, optimistic={'target_angle': angle})
 
     async def async_stop_cover_tilt(self, **kwargs):
         await self.device_send_props({'motor': 'stop'})
@@ -147,4 +158,4 @@ class XCoverEntity(XEntity, CoverEntity, RestoreEntity):
     async def async_set_cover_position(self, **kwargs):
         position = kwargs.get(ATTR_POSITION)
         if position is not None:
-            await self.device_send_props({'position': position})
\ No newline at end of file
+            await self.device_send_props({'position': position}, optimistic=self.motion_state(position))
\ No newline at end of file
@@ -0,0 +1,67 @@
+from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_HOST
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.components.diagnostics import async_redact_data, REDACTED
+
+from .core.const import *
+from .core.gateway import ProGateway
+from .core.device import XDevice
+
+TO_REDACT = {CONF_HOST, 'ip', 'mac', 'token'}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    data = {
+        'entry': {
+            'data': async_redact_data(dict(entry.data), TO_REDACT),
+            'options': async_redact_data(dict(entry.options), TO_REDACT),
+        },
+    }
+    gtw = hass.data.get(DOMAIN, {}).get(CONF_GATEWAYS, {}).get(entry.entry_id)
+    if not isinstance(gtw, ProGateway):
+        return data
+
+    def redact_host(value):
+        if isinstance(value, str) and gtw.host:
+            return value.replace(gtw.host, REDACTED)
+        return value
+
+    data['gateway'] = {
+        'pid': gtw.pid,
+        'connected': gtw.connected,
+        'metrics': gtw.metrics_snapshot(),
+    }
+    data['devices'] = [
+        async_redact_data(device_summary(dvc, redact_host), TO_REDACT)
+        for dvc in gtw.devices.values()
+    ]
+    data['trace'] = [
+        {
+            'time': ts,
+            'direction': direction,
+            'frame': redact_host(raw.decode(errors='replace').rstrip()),
+        }
+        for ts, direction, raw in gtw.trace.entries()
+    ]
+    if gtw.tracer.enabled:
+        data['spans'] = gtw.tracer.export()
+    return data
+
+
+def device_summary(dvc: XDevice, redact_host):
+    return {
+        'id': redact_host(dvc.id),
+        'class': type(dvc).__name__,
+        'name': dvc.name,
+        'nt': dvc.nt,
+        'type': dvc.type,
+        'pt': dvc.pt,
+        'available': dvc.available,
+        'firmware': dvc.firmware_version,
+        'params': dict(dvc.prop_params),
+        'converters': {
+            attr: {'class': type(conv).__name__, 'domain': conv.domain, 'prop': conv.prop, 'poll': conv.poll}
+            for attr, conv in dvc.converters.items()
+        },
+        'entities': sorted(dvc.entities),
+    }
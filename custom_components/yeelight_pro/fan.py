@@ -70,23 +70,14 @@ class XFanEntity(XEntity, FanEntity):
                 'high': 3,
             }
             speed = preset_map.get(preset_mode, 3)
-        await self.device_send_props({self._name: speed})
-        self._attr_is_on = speed > 0
-        self._attr_percentage = SPEED_TO_PERCENT.get(speed, 100 if speed == 3 else 66)
-        self.async_write_ha_state()
+        await self.device_send_props({self._name: speed}, optimistic={self._name: speed})
 
     async def async_turn_off(self, **kwargs):
-        await self.device_send_props({self._name: 0})
-        self._attr_is_on = False
-        self._attr_percentage = 0
-        self.async_write_ha_state()
+        await self.device_send_props({self._name: 0}, optimistic={self._name: 0})
 
     async def async_set_percentage(self, percentage: int):
         speed = self._percent_to_speed(percentage)
-        await self.device_send_props({self._name: speed})
-        self._attr_is_on = speed > 0
-        self._attr_percentage = SPEED_TO_PERCENT.get(speed, percentage)
-        self.async_write_ha_state()
+        await self.device_send_props({self._name: speed}, optimistic={self._name: speed})
 
     @property
     def percentage(self) -> Optional[int]:
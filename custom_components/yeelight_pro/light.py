@@ -1,6 +1,4 @@
 import logging
-import asyncio
-import time
 
 from homeassistant.core import callback
 from homeassistant.helpers.restore_state import RestoreEntity
@@ -44,7 +42,6 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
 
 class XLightEntity(XEntity, LightEntity, RestoreEntity):
     _attr_is_on = None
-    target_task: asyncio.Task = None
 
     def __init__(self, device: XDevice, conv: Converter, option=None):
         super().__init__(device, conv, option)
@@ -72,36 +69,8 @@ class XLightEntity(XEntity, LightEntity, RestoreEntity):
         if device.converters.get(ATTR_TRANSITION):
             self._attr_supported_features |= LightEntityFeature.TRANSITION
 
-        self._target_attrs = {}
-
     @callback
     def async_set_state(self, data: dict):
-        if self.target_task:
-            self.target_task.cancel()
-        diff = time.time() - self._target_attrs.get('time', 0)
-        delay = float(self._target_attrs.get(ATTR_TRANSITION) or 0)
-
-        async def set_state():
-            await asyncio.sleep(max(0, delay - diff + 0.01))
-            super().async_set_state(data)
-            self.async_write_ha_state()
-
-        if delay > 0 and diff < delay:
-            check_attrs = [ATTR_BRIGHTNESS, 'color_temp', ATTR_COLOR_TEMP_KELVIN]
-            for k in check_attrs:
-                if k not in data:
-                    continue
-                elif k not in self._target_attrs:
-                    check_attrs.remove(k)
-                elif self._target_attrs[k] == data[k]:
-                    self._target_attrs.pop(k, None)
-                    check_attrs.remove(k)
-            if check_attrs:
-                # ignore new state
-                self.target_task = self.hass.loop.create_task(set_state())
-                _LOGGER.info('%s: Ignore new state: %s', self.name, [data, self._target_attrs, diff, delay])
-                return
-
         super().async_set_state(data)
         if self._name in data:
             self._attr_is_on = data[self._name]
@@ -144,10 +113,6 @@ class XLightEntity(XEntity, LightEntity, RestoreEntity):
                 kwargs['color_temp'] = int(1000000 / float(_kelvin))
             except Exception:
                 pass
-        self._target_attrs = {
-            **kwargs,
-            'time': time.time(),
-        }
         if ATTR_RGB_COLOR in kwargs:
             self._attr_color_mode = ColorMode.RGB
         elif (ATTR_COLOR_TEMP_KELVIN in kwargs) or ('color_temp' in kwargs):
@@ -170,16 +135,18 @@ class XLightEntity(XEntity, LightEntity, RestoreEntity):
 
     async def async_turn(self, on=True, **kwargs):
         kwargs[self._name] = on
-        ret = await self.device_send_props(kwargs)
-        if ret:
-            self._attr_is_on = on
-            self.async_write_ha_state()
-        return ret
-
-    async def async_will_remove_from_hass(self):
-        if self.target_task:
-            self.target_task.cancel()
-        await super().async_will_remove_from_hass()
+        optimistic = {
+            k: kwargs[k]
+            for k in (self._name, ATTR_BRIGHTNESS, 'color_temp', ATTR_RGB_COLOR)
+            if k in kwargs
+        }
+        if 'color_temp' in optimistic and (cov := self.device.converters.get('color_temp')):
+            kelvin = int(1000000.0 / optimistic['color_temp'])
+            if hasattr(cov, 'mink') and hasattr(cov, 'maxk'):
+                kelvin = max(cov.mink, min(cov.maxk, kelvin))
+            optimistic[ATTR_COLOR_TEMP_KELVIN] = kelvin
+        delay = float(kwargs.get(ATTR_TRANSITION) or 0)
+        return await self.device_send_props(kwargs, optimistic=optimistic, delay=delay)
 
     @callback
     def async_restore_last_state(self, state: str, attrs: dict):
@@ -62,9 +62,7 @@ class XNumberEntity(XEntity, NumberEntity):
         kwargs = {
             self._name: value,
         }
-        if ret := await self.device_send_props(kwargs):
-            self._attr_native_value = value
-        return ret
+        return await self.device_send_props(kwargs, optimistic=kwargs)
 
 
 class DelayoffEntity(XNumberEntity):
@@ -50,13 +50,7 @@ class XSelectEntity(XEntity, SelectEntity):
         elif 'heater_level' in data and isinstance(self._map, dict):
             val = data.get('heater_level')
             self._attr_current_option = self._map.get(val)
-        
-        if self._attr_current_option:
-            self.async_write_ha_state()
 
     async def async_select_option(self, option: str) -> None:
         kwargs = {self._name: option}
-        ret = await self.device_send_props(kwargs)
-        if ret is not False:
-            self._attr_current_option = option
-            self.async_write_ha_state()
\ No newline at end of file
+        await self.device_send_props(kwargs, optimistic=kwargs)
\ No newline at end of file
@@ -68,7 +68,8 @@ class XActionEntity(XEntity, SensorEntity):
         self._attr_native_value = data[self._name]
         self._attr_extra_state_attributes = data
         self.clear_task = self.hass.loop.create_task(self.clear_state())
-        _LOGGER.info('%s: State changed: %s', self.entity_id, data)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('%s: State changed: %s', self.entity_id, data)
 
     async def clear_state(self):
         await asyncio.sleep(0.3)
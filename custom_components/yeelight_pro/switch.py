@@ -52,11 +52,7 @@ class XSwitchEntity(XEntity, SwitchEntity, RestoreEntity):
 
     async def async_turn(self, on=True, **kwargs):
         kwargs[self._name] = on
-        ret = await self.device_send_props(kwargs)
-        if ret:
-            self._attr_is_on = on
-            self.async_write_ha_state()
-        return ret
+        return await self.device_send_props(kwargs, optimistic={self._name: on})
 
     @callback
     def async_restore_last_state(self, state: str, attrs: dict):
@@ -1,4 +1,6 @@
 import asyncio
+import json
+import pytest
 
 from homeassistant.core import HomeAssistant
 from custom_components.yeelight_pro.core.device import (
@@ -6,7 +8,18 @@ from custom_components.yeelight_pro.core.device import (
     LightDevice,
     RelayDevice,
     SwitchPanelDevice,
+    SimpleSwitchDevice,
+    BathHeaterDevice,
+    CoverDevice,
+    GatewayDevice,
+    GroupDevice,
+    LightGroupDevice,
+    DEVICE_CLASSES,
+    register_device,
+    clear_converter_sets,
 )
+from custom_components.yeelight_pro.core.converters.base import PropConv
+from custom_components.yeelight_pro.switch import XSwitchEntity
 from .test_gateway import get_gateway
 
 
@@ -71,3 +84,239 @@ def test_switch_panel():
     assert data['switch2'] is True
     assert data['switch3'] is True
     assert data['backlight'] is True
+
+
+def test_optimistic_state():
+    gtw = get_gateway()
+    gtw.device = GatewayDevice(gtw)
+    device = SimpleSwitchDevice({"id": 1280, "nt": 2, "n": "开关", "type": 18})
+    device.gateways.append(gtw)
+    entity = XSwitchEntity(device, device.converters['switch'])
+
+    entity.async_set_optimistic({'switch': True})
+    assert entity.is_on is True
+
+    # a stale push must not override the commanded value
+    device.update({'switch': False})
+    assert entity.is_on is True
+
+    device.update({'switch': True})
+    assert not entity._optimistic
+
+    entity.async_set_optimistic({'switch': False})
+    assert entity.is_on is False
+    entity.async_rollback(['switch'])
+    assert entity.is_on is True
+
+    # never reported by the device, back to the restored state
+    device = SimpleSwitchDevice({"id": 1281, "nt": 2, "n": "开关", "type": 18})
+    device.gateways.append(gtw)
+    entity = XSwitchEntity(device, device.converters['switch'])
+    entity.async_set_optimistic({'switch': True})
+    assert entity.is_on is True
+    entity.async_rollback(['switch'])
+    assert entity.is_on is False
+    assert not entity._optimistic
+
+
+def test_latest_wins():
+    gtw = get_gateway()
+    sent = []
+
+    async def send(method, **kwargs):
+        sent.append(kwargs['nodes'][0]['set'])
+        await asyncio.sleep(0.01)
+        return {'id': len(sent)}
+
+    gtw.send = send
+    device = LightDevice({"id": 1290, "nt": 2, "n": "筒灯", "type": 2})
+    device.gateways.append(gtw)
+
+    async def drag():
+        return await asyncio.gather(*(
+            device.send_props({'brightness': v})
+            for v in (50, 100, 150, 200)
+        ))
+
+    res = asyncio.run(drag())
+    assert sent == [{'l': 78}]
+    assert res == [{'id': 1}] * 4
+    assert not device.command_slots
+
+    # overlapping attr sets merge into one frame, the last brightness wins
+    sent.clear()
+    device = LightDevice({"id": 1291, "nt": 2, "n": "筒灯", "type": 3})
+    device.gateways.append(gtw)
+
+    async def overlap():
+        first = asyncio.create_task(device.send_props({'brightness': 50}))
+        await asyncio.sleep(0.001)
+        return await asyncio.gather(
+            first,
+            device.send_props({'brightness': 100, 'color_temp': 250}),
+            device.send_props({'brightness': 200}),
+        )
+
+    res = asyncio.run(overlap())
+    assert sent == [{'l': 20}, {'l': 78, 'ct': 4000}]
+    assert res == [{'id': 1}, {'id': 2}, {'id': 2}]
+    assert not device.command_slots and not device.command_task
+
+
+def test_cover_actions():
+    gtw = get_gateway()
+    sent = []
+
+    async def send(method, **kwargs):
+        sent.append({k: v for k, v in kwargs['nodes'][0].items() if k not in ('id', 'nt')})
+        rid = len(sent)
+        await asyncio.sleep(0.01)
+        return {'id': rid}
+
+    gtw.send = send
+    device = CoverDevice({"id": 1295, "nt": 2, "n": "窗帘", "type": 6})
+    device.gateways.append(gtw)
+
+    async def open_close_stop():
+        opening = asyncio.create_task(device.send_props({'position': 100}))
+        await asyncio.sleep(0.001)
+        closing = asyncio.create_task(device.send_props({'position': 0}))
+        await asyncio.sleep(0)
+        stop = await device.send_props({'motor': 'stop'})
+        assert len(sent) == 2 and not opening.done()
+        return await asyncio.gather(opening, closing, asyncio.sleep(0, stop))
+
+    res = asyncio.run(open_close_stop())
+    # the stop goes out while the open is in flight and drops the pending close
+    assert sent == [
+        {'set': {'tp': 100}},
+        {'motor': {'action': {'motorAdjust': {'type': 0}}}},
+    ]
+    assert res == [{'id': 1}, False, {'id': 2}]
+    assert not device.command_slots and not device.command_task
+
+
+def test_group():
+    gtw = get_gateway()
+
+    async def _send(method, wait_result=True, **kwargs):
+        return None
+
+    gtw._send = _send
+
+    async def run():
+        for node in [
+            {"id": 1301, "nt": 2, "n": "灯1", "type": 2},
+            {"id": 1302, "nt": 2, "n": "灯2", "type": 2},
+            {"id": 1400, "nt": 1, "n": "客厅", "nodes": [1301, {"id": 1302}]},
+        ]:
+            await XDevice.from_node(gtw, node)
+        msg = {"method": "gateway_post.prop", "nodes": [
+            {"id": 1301, "nt": 2, "params": {"p": False, "l": 10}},
+            {"id": 1302, "nt": 2, "params": {"p": True, "l": 60}},
+        ]}
+        await gtw.on_message(json.dumps(msg).encode())
+        await gtw.settle()
+
+    asyncio.run(run())
+    room = gtw.devices[1400]
+    assert isinstance(room, LightGroupDevice)
+    assert room.unique_id == 'room_1400'
+    assert gtw.member_groups[1302] == {1400}
+    assert room.members_state() == {'p': True, 'l': 60}
+    assert room.encode({'light': False}) == {'set': {'p': False}}
+
+    # switch panels report their channels as `-sp`
+    assert GroupDevice.member_on({'0-blp': False, '1-sp': False, '2-sp': True})
+    assert not GroupDevice.member_on({'1-sp': False, '2-p': False})
+
+
+def test_load_scenes():
+    gtw = get_gateway()
+    gtw.device = GatewayDevice(gtw)
+    gtw.device.gateways.append(gtw)
+    batches = []
+    gtw.add_setup('button', lambda device, *convs: batches.append([c.attr for c in convs]))
+
+    scenes = [{"id": 1501, "n": "回家"}, {"id": 1502, "n": "离家"}]
+    asyncio.run(gtw.device.load_scenes(scenes))
+    assert batches == [['scene_1501', 'scene_1502']]
+
+    scenes = [{"id": 1502, "n": "离家模式"}, {"id": 1503, "n": "睡眠"}]
+    asyncio.run(gtw.device.load_scenes(scenes, complete=True))
+    assert batches[-1] == ['scene_1503']
+    assert 'scene_1501' not in gtw.device.converters
+    assert gtw.device.converters['scene_1502'].node['n'] == '离家模式'
+
+    # replies without a scene list never remove the registered scenes
+    replies = [{'code': -1, 'message': 'busy'}, {}, {'scenes': [{"id": 1503, "n": "睡眠"}]}]
+
+    async def query(key, method, **kwargs):
+        return replies.pop(0)
+
+    gtw.query = query
+    for _ in range(2):
+        assert asyncio.run(gtw.load_scenes()) is None
+        assert 'scene_1502' in gtw.device.converters
+    asyncio.run(gtw.load_scenes())
+    assert [a for a in gtw.device.converters if a.startswith('scene_')] == ['scene_1503']
+
+
+def test_prop_store():
+    device = LightDevice({"id": 1291, "nt": 2, "n": "灯带", "type": 3})
+    asyncio.run(device.prop_changed({"id": 1291, "params": {"p": True, "l": 20}}))
+    asyncio.run(device.prop_changed({"id": 1291, "params": {"ct": 4000}}))
+    asyncio.run(device.prop_changed({"id": 1291, "params": {"p": False}}))
+    asyncio.run(device.prop_changed({"id": 1291, "params": {"l": 30, "ct": 3000}}))
+
+    assert device.prop_params == {"p": False, "l": 30, "ct": 3000}
+    assert device.prop.version == 2
+
+
+def test_shared_converters():
+    prop = {"params": {"p": True, "l": 20, "ct": 4000}}
+    lights = [LightDevice({"id": i, "nt": 2, "n": f"灯{i}", "type": 3}) for i in (1701, 1702)]
+    for device in lights:
+        asyncio.run(device.prop_changed({"id": device.id, **prop}))
+    assert lights[0].converters is lights[1].converters
+    assert lights[0].decode(prop) == lights[1].decode(prop)
+    assert lights[0].encode_plan is lights[1].encode_plan
+    assert lights[0].encode({'light': True, 'brightness': 51, 'unknown': 1}) == {'set': {'p': True, 'l': 20}}
+
+    with pytest.raises(TypeError):
+        lights[0].add_converter(PropConv('angel', 'number'))
+    conv = lights[0].converters['brightness']
+    with pytest.raises(AttributeError):
+        conv.poll = True
+    assert conv.replace(poll=True).poll and not conv.poll
+
+    clear_converter_sets()
+    device = LightDevice({"id": 1703, "nt": 2, "n": "灯1703", "type": 3})
+    asyncio.run(device.prop_changed({"id": device.id, **prop}))
+    assert device.converters is not lights[0].converters
+
+    # heater_mode and heater_power both write `p`, converter order decides
+    heater = BathHeaterDevice({"id": 1801, "nt": 2, "n": "浴霸", "type": 2049})
+    expected = {'set': {'p': True, 'bhm': 1}}
+    assert heater.encode({'heater_mode': '智能干燥', 'heater_power': False}) == expected
+    assert heater.encode({'heater_power': False, 'heater_mode': '智能干燥'}) == expected
+
+
+def test_device_registry():
+    gtw = get_gateway()
+
+    @register_device(7, pt=99)
+    class CustomRelayDevice(RelayDevice):
+        __slots__ = ()
+
+    try:
+        node = {"id": 2001, "nt": 2, "n": "custom", "type": 7, "pt": 99}
+        device = asyncio.run(XDevice.from_node(gtw, node))
+        assert type(device) is CustomRelayDevice
+    finally:
+        DEVICE_CLASSES.pop((7, 99))
+
+    node = {"id": 2002, "nt": 2, "n": "unknown", "type": 4242}
+    assert asyncio.run(XDevice.from_node(gtw, node)) is None
+    assert asyncio.run(XDevice.from_node(gtw, node)) is None
+    assert gtw.unsupported == {2002: 4242}
@@ -1,7 +1,16 @@
 import asyncio
+import json
+import logging
+import time
+import pytest
+import voluptuous as vol
 
 from homeassistant.core import HomeAssistant
+from custom_components.yeelight_pro import ComponentServices, init_integration_data
+from custom_components.yeelight_pro.core.const import DOMAIN, CONF_GATEWAYS
 from custom_components.yeelight_pro.core.gateway import ProGateway
+from custom_components.yeelight_pro.core.device import AirConditionDevice, GatewayDevice, SimpleSwitchDevice
+from custom_components.yeelight_pro.switch import XSwitchEntity
 
 
 class Hass(HomeAssistant):
@@ -21,7 +30,555 @@ def get_gateway(host=None):
     return ProGateway(host)
 
 
+def reply_writer(gtw, frames, reply):
+    """A stream writer answering each frame with `reply(frame)` like the gateway does."""
+
+    class Writer:
+        def write(self, raw):
+            frames.append(frame := json.loads(raw))
+            if (res := reply(frame)) is not None:
+                asyncio.get_running_loop().call_soon(
+                    lambda: asyncio.ensure_future(gtw.on_message(json.dumps(res).encode()))
+                )
+
+        async def drain(self):
+            pass
+
+    return Writer()
+
+
 def test_gateway():
     host = '127.0.0.1'
     gtw = get_gateway(host)
     assert gtw.host == host
+
+
+def test_send_dedup():
+    gtw = get_gateway()
+    calls = []
+
+    async def _send(method, wait_result=True, **kwargs):
+        calls.append([method, kwargs])
+        await asyncio.sleep(0.01)
+        return {'result': 'ok'}
+
+    gtw._send = _send
+    node = {'id': 1270, 'nt': 2, 'set': {'p': False}}
+
+    async def burst():
+        return await asyncio.gather(*(
+            gtw.send('gateway_set.prop', nodes=[dict(node)])
+            for _ in range(3)
+        ))
+
+    res = asyncio.run(burst())
+    assert len(calls) == 1
+    assert res == [{'result': 'ok'}] * 3
+    assert gtw.counters['dedup_hit'] == 2
+    assert gtw.dedup_rate == 2 / 3
+    assert not gtw._inflight
+
+
+def test_room_index():
+    gtw = get_gateway()
+
+    async def _send(method, wait_result=True, **kwargs):
+        if method == 'gateway_get.room':
+            return {'rooms': [{'id': 1400, 'n': '客厅', 'nodes': [{'id': 1301, 'nt': 2}, 1302]}]}
+        return None
+
+    gtw._send = _send
+    rooms = asyncio.run(gtw.load_rooms())
+    assert rooms[1400]['nodes'] == {1301, 1302}
+    assert gtw.room_of(1302)['n'] == '客厅'
+    assert gtw.room_of(1999) is None
+
+
+def test_query_cache():
+    gtw = get_gateway()
+    calls = []
+
+    async def _send(method, wait_result=True, **kwargs):
+        calls.append(method)
+        return {'nodes': [{'id': kwargs['params']['id']}]}
+
+    gtw._send = _send
+
+    async def run():
+        await gtw.get_node(1270)
+        await gtw.get_node(1270)
+        msg = {'method': 'gateway_post.prop', 'nodes': [{'id': 1270, 'nt': 2, 'params': {'p': True}}]}
+        await gtw.on_message(json.dumps(msg).encode())
+        await gtw.get_node(1270)
+
+    asyncio.run(run())
+    assert calls == ['gateway_get.node', 'gateway_get.node']
+    assert gtw.cache.stats() == {'size': 1, 'hits': 1, 'misses': 2}
+
+
+def test_poll_scheduler():
+    gtw = get_gateway()
+    device = AirConditionDevice({'id': 1600, 'nt': 2, 'n': '空调', 'type': 15})
+    device.gateways.append(gtw)
+    gtw.devices[device.id] = device
+    poller = gtw.poller
+
+    # devices seen for the first time are spread over the interval
+    assert poller.due_nodes(1000) == []
+    assert 1000 <= poller.due[1600] <= 1000 + poller.interval
+
+    poller.due[1600] = 0
+    assert poller.due_nodes(1000) == [1600]
+
+    device.pushed_at['1-act'] = 990
+    poller.due[1600] = 0
+    assert poller.due_nodes(1000) == []
+    assert poller.backoff[1600] == poller.interval * 2
+
+    # due nodes are read with the per-node get_node query, the reply goes through the gateway
+    sent = []
+    gtw.writer = reply_writer(gtw, sent, lambda frame: {
+        'id': frame['id'], 'nodes': [{'id': 1600, 'nt': 2, 'params': {'1-acp': True, '1-act': 26}}],
+    })
+    device.pushed_at.clear()
+    poller.due[1600] = 0
+
+    async def run():
+        await poller.poll_due()
+        await gtw.settle()
+
+    asyncio.run(run())
+    assert [[f['method'], f['params']] for f in sent] == [['gateway_get.node', {'id': 1600}]]
+    assert device.prop_params['1-act'] == 26
+    assert '1-act' not in device.pushed_at
+
+
+def test_availability():
+    gtw = get_gateway()
+    device = AirConditionDevice({'id': 1600, 'nt': 2, 'n': '空调', 'type': 15})
+    device.gateways.append(gtw)
+    gtw.devices[device.id] = device
+    assert device.available is False
+
+    gtw.writer = object()
+    assert gtw.refresh_availability() == [device]
+    assert device.available is True
+    assert gtw.refresh_availability() == []
+
+    asyncio.run(device.prop_changed({'id': 1600, 'o': False, 'params': {}}))
+    assert gtw.refresh_availability([1600]) == [device]
+    assert device.available is False
+
+    asyncio.run(device.prop_changed({'id': 1600, 'o': True, 'params': {}}))
+    gtw.stale_timeout = 60
+    device.updated_at -= 120
+    assert device.available is False
+
+
+def test_ordered_dispatch():
+    gtw = get_gateway()
+    states = []
+
+    class Recorder(SimpleSwitchDevice):
+        __slots__ = ()
+
+        def update(self, value):
+            states.append(value.get('switch'))
+
+    device = Recorder({'id': 1700, 'nt': 2, 'n': '开关', 'type': 18})
+
+    async def run():
+        await gtw.add_device(device)
+        for p in [True, False, True]:
+            msg = {'method': 'gateway_post.prop', 'nodes': [{'id': 1700, 'nt': 2, 'params': {'p': p}}]}
+            await gtw.on_message(json.dumps(msg).encode())
+        assert 1700 in gtw.queues
+        await gtw.settle()
+        msg = {'method': 'gateway_post.prop', 'nodes': [{'id': 1700, 'nt': 2, 'params': {'p': False}}]}
+        await gtw.on_message(json.dumps(msg).encode())
+        assert not gtw.queues
+
+    asyncio.run(run())
+    assert states == [True, False, True, False]
+
+
+def test_node_reply():
+    gtw = get_gateway()
+    sent = []
+    gtw.writer = reply_writer(gtw, sent, lambda frame: {
+        'id': frame['id'], 'nodes': [{'id': 1310, 'nt': 2, 'n': '筒灯', 'type': 2, 'params': {'p': True}}],
+    })
+
+    async def run():
+        await gtw.get_node(1310)
+        await gtw.settle()
+
+    asyncio.run(run())
+    assert sent[0]['method'] == 'gateway_get.node'
+    device = gtw.devices[1310]
+    assert device.prop_params == {'p': True}
+    assert 'p' not in device.pushed_at
+
+
+def test_unhandled_method():
+    gtw = get_gateway()
+    msg = {'method': 'gateway_post.unknown', 'params': {'id': 1}}
+    asyncio.run(gtw.on_message(json.dumps(msg).encode()))
+    assert gtw.counters['unhandled'] == 1
+    assert 'frames_in' not in gtw.counters
+    assert gtw.metrics.frames_in == {'gateway_post.unknown': 1}
+    assert gtw.handlers['device_post.prop'] == gtw.on_prop
+
+
+def test_log_sample(caplog):
+    gtw = ProGateway('127.0.0.1', log_sample=2)
+    msg = {'method': 'gateway_post.unknown', 'params': {'id': 1}}
+
+    async def run():
+        for _ in range(4):
+            await gtw.on_message(json.dumps(msg).encode())
+
+    with caplog.at_level(logging.DEBUG, logger=gtw.protocol_log.name):
+        asyncio.run(run())
+    assert [r.args[2] for r in caplog.records if r.name == gtw.protocol_log.name] == [2, 4]
+    assert sum(gtw.metrics.frames_in.values()) == 4
+
+
+def test_metrics():
+    gtw = get_gateway()
+    msgs = [
+        {'method': 'gateway_post.prop', 'nodes': [{'id': 1, 'nt': 2, 'params': {'p': True}}]},
+        {'id': 1234567890, 'result': 'ok'},
+    ]
+
+    async def run():
+        for msg in msgs:
+            await gtw.on_message(json.dumps(msg).encode())
+        await gtw.settle()
+
+    asyncio.run(run())
+    gtw.metrics.reply('gateway_get.node', 0.03)
+    gtw.metrics.reply('gateway_get.node', 3)
+    snap = gtw.metrics_snapshot()
+    assert snap['frames_in'] == {'gateway_post.prop': 1, 'reply': 1}
+    assert snap['orphans'] == 1
+    assert snap['decode']['count'] == 2
+    assert snap['rtt']['gateway_get.node']['p50'] == 0.05
+    assert snap['rtt']['gateway_get.node']['max'] == 3
+    assert snap['pending'] == 0
+    assert gtw.metrics_summary()['rtt'] == 1515.0
+
+
+def test_frame_trace():
+    from custom_components.yeelight_pro.core.trace import FrameTrace
+
+    trace = FrameTrace(3)
+    for i in range(5):
+        trace.record('in', b'%d' % i)
+    assert len(trace) == 3
+    assert [raw for _, _, raw in trace.entries()] == [b'2', b'3', b'4']
+
+    gtw = get_gateway()
+    msg = {'method': 'gateway_post.prop', 'nodes': []}
+    asyncio.run(gtw.on_message(json.dumps(msg).encode()))
+    assert gtw.trace.entries()[-1][1] == 'in'
+
+
+def test_capture_replay(tmp_path):
+    from custom_components.yeelight_pro.core.capture import read_capture, replay
+
+    path = str(tmp_path / 'capture.jsonl')
+    msgs = [
+        {'method': 'gateway_post.topology', 'nodes': [{'id': 1800, 'nt': 2, 'n': '灯', 'type': 2}]},
+        {'method': 'gateway_post.prop', 'nodes': [{'id': 1800, 'nt': 2, 'params': {'p': True, 'l': 10}}]},
+        {'method': 'gateway_post.prop', 'nodes': [{'id': 1800, 'nt': 2, 'params': {'l': 90}}]},
+    ]
+
+    async def record():
+        gtw = ProGateway('127.0.0.1', offline=True)
+        await gtw.start_capture(path)
+        for msg in msgs:
+            await gtw.on_message(json.dumps(msg).encode() + b'\r\n')
+        await gtw.settle()
+        return await gtw.stop_capture()
+
+    assert asyncio.run(record()).count == 3
+    frames = list(read_capture(path))
+    assert [json.loads(raw) for _, raw in frames] == msgs
+
+    gtw = ProGateway('127.0.0.1', offline=True)
+    count, _ = asyncio.run(replay(gtw, frames, speed=0))
+    assert count == 3
+    assert gtw.devices[1800].prop_params == {'p': True, 'l': 90}
+
+
+def test_tracing():
+    gtw = ProGateway('127.0.0.1', offline=True, tracing=True)
+    device = SimpleSwitchDevice({'id': 1900, 'nt': 2, 'n': '开关', 'type': 18})
+    msg = {'method': 'gateway_post.prop', 'nodes': [{'id': 1900, 'nt': 2, 'params': {'p': True}}]}
+
+    async def run():
+        if device.prop.merge({'params': {'p': False}}):
+            device.build_converters()
+        gtw.devices[device.id] = device
+        await gtw.on_message(json.dumps(msg).encode(), (0.0, 0.5, 1.0))
+
+    asyncio.run(run())
+    spans = gtw.tracer.export()
+    assert [s['stage'] for s in spans] == ['socket_read', 'framing', 'json_decode', 'decode', 'update', 'dispatch']
+    assert {s['trace'] for s in spans} == {1}
+    assert spans[1]['duration_ms'] == 500.0
+
+    gtw.tracer.enabled = False
+    asyncio.run(gtw.on_message(json.dumps(msg).encode()))
+    assert len(gtw.tracer.spans) == 6
+
+
+def test_rtt_estimator():
+    from custom_components.yeelight_pro.core.rtt import RttEstimator
+
+    rtt = RttEstimator(5, min_timeout=0.2, max_timeout=30, initials={'gateway_get.topology': 30})
+    assert rtt.timeout('gateway_set.prop') == 5
+    assert rtt.timeout('gateway_get.topology') == 30
+    for _ in range(20):
+        rtt.sample('gateway_set.prop', 0.05)
+    assert rtt.timeout('gateway_set.prop') == 0.2
+    rtt.sample('gateway_set.prop', 0.25)
+    assert 0.2 < rtt.timeout('gateway_set.prop') < 1
+    before = rtt.timeout('gateway_set.prop')
+    assert rtt.timeout('gateway_set.prop', 1) == before * 2
+    rtt.sample('gateway_set.prop', 0.05)
+    assert rtt.timeout('gateway_set.prop') < before
+
+
+def test_rtt_jitter():
+    import random
+    from custom_components.yeelight_pro.core.rtt import RttEstimator
+
+    rng = random.Random(6298)
+    rtt = RttEstimator(5, max_timeout=30)
+    assert rtt.min_timeout == 1
+    # LAN replies of 20-80ms with occasional 300ms spikes stay near the 1s floor
+    timeouts = []
+    for i in range(200):
+        rtt.sample('gateway_set.prop', 0.3 if i % 25 == 0 else rng.uniform(0.02, 0.08))
+        timeouts.append(rtt.timeout('gateway_set.prop'))
+    assert min(timeouts) == 1 and max(timeouts) < 1.5
+    assert timeouts[-1] == 1
+    # retries back off from the clamped timeout, the next command starts over
+    assert rtt.timeout('gateway_set.prop', 1) == 2
+    assert rtt.timeout('gateway_set.prop', 2) == 4
+    assert rtt.timeout('gateway_set.prop', 10) == 30
+    assert rtt.timeout('gateway_set.prop') == 1
+
+
+def test_dead_link():
+    gtw = ProGateway('127.0.0.1', timeout_min=0.02, retries=1, retry_backoff=0.001, max_wait=10)
+    for _ in range(20):
+        gtw.rtt.sample('gateway_set.prop', 0.001)
+    frames = []
+    gtw.writer = reply_writer(gtw, frames, lambda frame: None)
+
+    async def send():
+        start = time.perf_counter()
+        assert await gtw.send('gateway_set.prop', nodes=[{'id': 1, 'nt': 2, 'set': {'p': True}}]) is None
+        return time.perf_counter() - start
+
+    # timeouts of a dead command don't carry over to the next ones
+    elapsed = [asyncio.run(send()) for _ in range(4)]
+    assert max(elapsed) < 0.2
+    assert gtw.rtt.timeout('gateway_set.prop') == 0.02
+
+
+def test_retry_idempotent():
+    gtw = ProGateway('127.0.0.1', timeout=0.05, timeout_min=0.01, retry_backoff=0.01, max_wait=1)
+    frames = []
+
+    class Writer:
+        def write(self, raw):
+            frames.append(json.loads(raw))
+            if len(frames) % 3 == 2:
+                reply = {'id': frames[-1]['id'], 'result': 'ok'}
+                asyncio.get_running_loop().call_soon(
+                    lambda: asyncio.ensure_future(gtw.on_message(json.dumps(reply).encode()))
+                )
+
+        async def drain(self):
+            pass
+
+    gtw.writer = Writer()
+    stop = {'id': 1, 'nt': 2, 'motor': {'action': {'motorAdjust': {'type': 0}}}}
+
+    async def run():
+        res = await gtw.send('gateway_set.prop', nodes=[{'id': 1, 'nt': 2, 'set': {'p': True}}])
+        assert res == {'id': frames[0]['id'], 'result': 'ok'}
+        assert await gtw.send('gateway_set.prop', nodes=[stop]) is None
+
+    asyncio.run(run())
+    assert len(frames) == 3
+    assert frames[0]['id'] == frames[1]['id']
+    assert frames[2]['nodes'] == [stop]
+    assert gtw.metrics.retries == {'gateway_set.prop': 1}
+    # retries go through the same write path, the reply is recorded but not sampled (Karn)
+    assert gtw.metrics.frames_out == {'gateway_set.prop': 3}
+    assert [d for _, d, _ in gtw.trace.entries()].count('out') == 3
+    assert gtw.metrics.rtt['gateway_set.prop'].count == 1
+    assert 'gateway_set.prop' not in gtw.rtt.srtt
+
+    # the retries of a command never wait longer than max_wait in total
+    gtw = ProGateway('127.0.0.1', timeout=0.3, timeout_min=0.1, retry_backoff=0.01)
+    assert gtw.max_wait == 0.3
+    for _ in range(20):
+        gtw.rtt.sample('gateway_get.node', 0.01)
+    frames.clear()
+    gtw.writer = reply_writer(gtw, frames, lambda frame: None)
+
+    async def silent(nid):
+        start = time.perf_counter()
+        assert await gtw.send('gateway_get.node', params={'id': nid}) is None
+        return time.perf_counter() - start
+
+    for nid in range(1, 4):
+        assert asyncio.run(silent(nid)) < 0.4
+    assert gtw.metrics.timeouts['gateway_get.node'] > 3
+
+
+def test_set_props_service(tmp_path):
+    gtw = get_gateway()
+    sent = []
+
+    async def send(method, **kwargs):
+        sent.append([method, kwargs['nodes']])
+        return {'nodes': [{'id': n['id'], 'result': 'ok'} for n in kwargs['nodes']]}
+
+    gtw.send = send
+    gtw.device = GatewayDevice(gtw)
+    for nid in (1801, 1802):
+        dvc = SimpleSwitchDevice({'id': nid, 'nt': 2, 'type': 18})
+        dvc.gateways.append(gtw)
+        gtw.devices[nid] = dvc
+    entity = XSwitchEntity(gtw.devices[1801], gtw.devices[1801].converters['switch'])
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        init_integration_data(hass)
+        hass.data[DOMAIN][CONF_GATEWAYS][gtw.host] = gtw
+        ComponentServices(hass)
+        res = await hass.services.async_call(DOMAIN, 'set_props', {'targets': [
+            {'entity_id': entity.entity_id, 'values': {'switch': True}},
+            {'node': 1802, 'values': {'switch': False}},
+        ]}, blocking=True, return_response=True)
+        with pytest.raises(vol.Invalid):
+            await hass.services.async_call(DOMAIN, 'set_props', {'targets': [
+                {'values': {'switch': True}},
+            ]}, blocking=True, return_response=True)
+        await hass.async_stop(force=True)
+        return res
+
+    res = asyncio.run(run())
+    assert sent == [['gateway_set.prop', [
+        {'id': 1801, 'nt': 2, 'set': {'p': True}},
+        {'id': 1802, 'nt': 2, 'set': {'p': False}},
+    ]]]
+    assert [r['result'] for r in res['results']] == [{'id': 1801, 'result': 'ok'}, {'id': 1802, 'result': 'ok'}]
+
+
+def test_diagnostics(tmp_path):
+    from homeassistant.config_entries import ConfigEntry
+    from custom_components.yeelight_pro.diagnostics import async_get_config_entry_diagnostics
+
+    host = '192.168.31.25'
+    gtw = ProGateway(host, offline=True)
+    entry = ConfigEntry(
+        version=1, minor_version=1, domain=DOMAIN, title=host, source='user',
+        data={'host': host}, options={'timeout_min': 1}, entry_id='entry1',
+    )
+    msgs = [
+        {'method': 'gateway_post.topology', 'nodes': [{'id': 1820, 'nt': 2, 'n': '灯', 'type': 2}]},
+        {'method': 'gateway_post.prop', 'nodes': [{'id': 1820, 'nt': 2, 'params': {'p': True, 'mac': 'aa:bb'}}]},
+        {'method': 'gateway_post.event', 'params': {'id': 1820, 'host': host}},
+    ]
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        init_integration_data(hass)
+        hass.data[DOMAIN][CONF_GATEWAYS][entry.entry_id] = gtw
+        for msg in msgs:
+            await gtw.on_message(json.dumps(msg).encode())
+        await gtw.settle()
+        data = await async_get_config_entry_diagnostics(hass, entry)
+        await hass.async_stop(force=True)
+        return data
+
+    data = asyncio.run(run())
+    assert set(data) == {'entry', 'gateway', 'devices', 'trace'}
+    assert data['entry'] == {'data': {'host': '**REDACTED**'}, 'options': {'timeout_min': 1}}
+    assert set(data['gateway']) == {'pid', 'connected', 'metrics'}
+    assert data['gateway']['metrics']['frames_in']['gateway_post.prop'] == 1
+    device = next(d for d in data['devices'] if d['id'] == 1820)
+    assert device['class'] == 'LightDevice'
+    assert device['params'] == {'p': True, 'mac': '**REDACTED**'}
+    assert set(device['converters']['light']) == {'class', 'domain', 'prop', 'poll'}
+    assert [t['direction'] for t in data['trace']] == ['in'] * 3
+    assert host not in json.dumps(data, ensure_ascii=False)
+
+
+def test_profile_service(tmp_path):
+    from homeassistant.components.persistent_notification import _async_get_or_create_notifications
+
+    host = '192.168.31.26'
+    gtw = ProGateway(host, offline=True)
+    msg = {'method': 'gateway_post.prop', 'nodes': [{'id': 1830, 'nt': 2, 'params': {'p': True}}]}
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        init_integration_data(hass)
+        hass.data[DOMAIN][CONF_GATEWAYS][host] = gtw
+        services = ComponentServices(hass)
+        # returns once the profiler runs, the stop is scheduled
+        await asyncio.wait_for(hass.services.async_call(DOMAIN, 'profile', {'duration': 60, 'top': 5}, blocking=True), 1)
+        assert services._profiling and services._profile_stop
+        for _ in range(20):
+            await gtw.on_message(json.dumps(msg).encode())
+            await asyncio.sleep(0.001)
+        await services.async_stop_profile()
+        assert not services._profiling and not services._profile_stop
+        notification = _async_get_or_create_notifications(hass)[f'{DOMAIN}-profile']
+        await hass.async_stop(force=True)
+        return notification['message']
+
+    message = asyncio.run(run())
+    head, table = message.split('\n\n', 1)
+    path = head.split('`')[1]
+    assert path.startswith(str(tmp_path)) and path.endswith('.prof')
+    assert (tmp_path / path.rsplit('/', 1)[-1]).exists()
+    lines = table.strip('`\n').splitlines()
+    assert lines[0].split() == ['ncalls', 'tottime', 'percall', 'cumtime', 'percall', 'filename:lineno(function)']
+    assert 1 < len(lines) <= 6
+    assert all('yeelight_pro' in line for line in lines[1:])
+    assert host not in message
+
+
+def test_capture_service(tmp_path):
+    from homeassistant.components.persistent_notification import _async_get_or_create_notifications
+
+    gtw = ProGateway('192.168.31.27', offline=True)
+    msg = {'method': 'gateway_post.prop', 'nodes': [{'id': 1840, 'nt': 2, 'params': {'p': True}}]}
+
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        init_integration_data(hass)
+        hass.data[DOMAIN][CONF_GATEWAYS][gtw.host] = gtw
+        services = ComponentServices(hass)
+        # returns once recording started, the stop is scheduled
+        await asyncio.wait_for(hass.services.async_call(DOMAIN, 'capture', {'duration': 60}, blocking=True), 1)
+        assert gtw.recorder and services._capture_stop
+        await gtw.on_message(json.dumps(msg).encode())
+        await services.async_stop_capture()
+        assert not gtw.recorder and not services._capture_stop
+        notification = _async_get_or_create_notifications(hass)[f'{DOMAIN}-capture']
+        await hass.async_stop(force=True)
+        return notification['message']
+
+    message = asyncio.run(run())
+    assert message.startswith(f'{gtw.host}: 1 frames in `{tmp_path}')